@@ -7,6 +7,14 @@ class Settings(BaseSettings):
     SECRET_KEY: str = os.getenv("SECRET_KEY", "super_secret_key_change_me_in_prod_12345")
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 7  # 7 days
+    # Authenticated principals are cached per user ID for this long (0 disables)
+    PRINCIPAL_CACHE_TTL_SECONDS: float = float(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "60"))
+    PRINCIPAL_CACHE_SIZE: int = int(os.getenv("PRINCIPAL_CACHE_SIZE", "10000"))
+    # Build the principal from the signed token alone, with no user lookup;
+    # deleted users then stay authenticated until their token expires
+    TRUST_TOKEN_CLAIMS: bool = os.getenv("TRUST_TOKEN_CLAIMS", "false").lower() in ("1", "true")
+    # Adds X-DB-Query-Count / X-DB-Query-Time-Ms response headers
+    DEBUG: bool = os.getenv("DEBUG", "false").lower() in ("1", "true")
     
     # Database
     POSTGRES_USER: str = os.getenv("POSTGRES_USER", "postgres")
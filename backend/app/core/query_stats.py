@@ -0,0 +1,82 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+class QueryStats:
+    """SQL statements executed while tracking is active, with total time"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration_ms = 0.0
+        self.statements: List[str] = []
+
+    def record(self, statement: str, duration_ms: float):
+        self.count += 1
+        self.duration_ms += duration_ms
+        self.statements.append(statement)
+
+
+# The stats object is shared, not reassigned, so counts made in threadpool
+# copies of the context (sync routes and dependencies) reach the request
+_current: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+# The start time lives on the statement's execution context, not the connection,
+# so a statement that raises leaves nothing behind on the pooled connection
+def _before_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._query_stats_start = time.perf_counter()
+
+
+def _after_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    started = getattr(context, "_query_stats_start", None)
+    if stats is not None and started is not None:
+        stats.record(statement, (time.perf_counter() - started) * 1000)
+
+
+def _handle_error(exception_context):
+    # Failed statements still count (after_cursor_execute never fires for them)
+    stats = _current.get()
+    started = getattr(exception_context.execution_context, "_query_stats_start", None)
+    if stats is not None and started is not None:
+        stats.record(exception_context.statement, (time.perf_counter() - started) * 1000)
+
+
+def install(engine: Engine):
+    """Count and time every statement the engine runs (idempotent)"""
+    if not event.contains(engine, "before_cursor_execute", _before_execute):
+        event.listen(engine, "before_cursor_execute", _before_execute)
+        event.listen(engine, "after_cursor_execute", _after_execute)
+        event.listen(engine, "handle_error", _handle_error)
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    """Collect statements run in this context (and threads it hands work to)"""
+    stats = QueryStats()
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def assert_max_queries(limit: int) -> Iterator[QueryStats]:
+    """
+    Fail if the block runs more than `limit` statements, e.g. to catch N+1 loads
+
+        with assert_max_queries(3):
+            client.get("/api/movies/trending")
+    """
+    with track_queries() as stats:
+        yield stats
+    if stats.count > limit:
+        executed = "\n".join(f"  {i + 1}. {s}" for i, s in enumerate(stats.statements))
+        raise AssertionError(f"Expected at most {limit} queries, ran {stats.count}:\n{executed}")
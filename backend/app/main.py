@@ -1,10 +1,19 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from backend.app.routers import auth, movies
-from backend.app.database import engine, Base
+from backend.app.core import query_stats
+from backend.app.core.config import settings
+from backend.app.database import engine, Base, upgrade_table
+from backend.app.models.all_models import Movie, WatchHistory
+from backend.app.pagination import NEXT_CURSOR_HEADER
+from backend.app.search import ensure_search_index
 
 # Create tables if not exist (Simulating migration for simple setup)
 Base.metadata.create_all(bind=engine)
+# create_all skips columns and indexes added to tables that already exist
+for table in (Movie.__table__, WatchHistory.__table__):
+    upgrade_table(engine, table)
+ensure_search_index(engine)
 
 app = FastAPI(title="Pro Movie Recommender", version="1.0.0")
 
@@ -15,8 +24,21 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
+# Per-request SQL count and time, to spot N+1 loads
+if settings.DEBUG:
+    query_stats.install(engine)
+
+    @app.middleware("http")
+    async def add_query_stats(request: Request, call_next):
+        with query_stats.track_queries() as stats:
+            response = await call_next(request)
+        response.headers["X-DB-Query-Count"] = str(stats.count)
+        response.headers["X-DB-Query-Time-Ms"] = f"{stats.duration_ms:.2f}"
+        return response
+
 app.include_router(auth.router, prefix="/api/auth", tags=["Auth"])
 app.include_router(movies.router, prefix="/api", tags=["Movies"])
 
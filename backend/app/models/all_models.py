@@ -1,4 +1,4 @@
-from sqlalchemy import Boolean, Column, ForeignKey, Integer, String, Float, DateTime, Text, Table, UniqueConstraint
+from sqlalchemy import Boolean, Column, ForeignKey, Integer, String, Float, DateTime, Text, Table, UniqueConstraint, JSON, BigInteger, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from backend.app.database import Base
@@ -41,6 +41,18 @@ class Movie(Base):
     poster_path = Column(String, nullable=True)
     vote_average = Column(Float, default=0.0)
     popularity = Column(Float, default=0.0)
+
+    # Catalog sync (scripts/sync_catalog.py) fills these from links.csv + TMDB
+    movielens_id = Column(Integer, unique=True, index=True, nullable=True)
+    vote_count = Column(Integer, default=0)
+    runtime = Column(Integer, nullable=True)
+    tagline = Column(String, nullable=True)
+    backdrop_path = Column(String, nullable=True)
+    budget = Column(BigInteger, default=0)
+    revenue = Column(BigInteger, default=0)
+    director = Column(String, nullable=True)
+    top_cast = Column(JSON, nullable=True) # Top billed names, in order
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), index=True)
     
     genres = relationship("Genre", secondary=movie_genres, back_populates="movies")
     ratings = relationship("Rating", back_populates="movie")
@@ -71,3 +83,6 @@ class WatchHistory(Base):
     
     user = relationship("User", back_populates="history")
     movie = relationship("Movie", back_populates="watched_by")
+
+    # Serves the newest-first history listing and its keyset cursor
+    __table_args__ = (Index('ix_watch_history_user_watched', 'user_id', 'watched_at', 'id'),)
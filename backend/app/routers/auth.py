@@ -3,16 +3,17 @@ from sqlalchemy.orm import Session
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from backend.app.database import get_db
 from backend.app.models.all_models import User
-from backend.app.schemas.schemas import UserCreate, Token, TokenData
+from backend.app.schemas.schemas import UserCreate, Token, TokenData, Principal
 from backend.app.core.security import verify_password, get_password_hash, create_access_token
 from backend.app.core.config import settings
+from backend.app.core.principal_cache import principal_cache
 from jose import jwt, JWTError
 
 router = APIRouter()
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/auth/login")
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> Principal:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -27,11 +28,21 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = De
         token_data = TokenData(email=email, user_id=user_id)
     except JWTError:
         raise credentials_exception
-        
+
+    # The signature already vouches for id and email
+    if settings.TRUST_TOKEN_CLAIMS:
+        return Principal(id=token_data.user_id, email=token_data.email)
+
+    principal = principal_cache.get(token_data.user_id)
+    if principal is not None:
+        return principal
+
     user = db.query(User).filter(User.id == token_data.user_id).first()
     if user is None:
         raise credentials_exception
-    return user
+    principal = Principal.model_validate(user)
+    principal_cache.set(principal)
+    return principal
 
 @router.post("/register", response_model=Token)
 def register(user: UserCreate, db: Session = Depends(get_db)):
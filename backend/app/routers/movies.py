@@ -1,11 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import func, desc
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy import func, desc, and_, or_
 from typing import List, Optional
 from backend.app.database import get_db
 from backend.app.models.all_models import Movie, Rating, WatchHistory, Genre
-from backend.app.schemas.schemas import MovieBase, RatingCreate, RatingResponse, HistoryResponse
-from backend.app.routers.auth import get_current_user, User
+from backend.app.schemas.schemas import MovieBase, MovieSuggestion, RatingCreate, RatingResponse, HistoryResponse, Principal
+from backend.app.routers.auth import get_current_user
+from backend.app.search import search_titles, title_autocomplete
+from backend.app.pagination import NEXT_CURSOR_HEADER, decode_cursor, encode_cursor
 from backend.ml.engine import engine as recommender
 
 router = APIRouter()
@@ -13,23 +16,46 @@ router = APIRouter()
 # --- Public Movie Routes ---
 @router.get("/movies/search", response_model=List[MovieBase])
 def search_movies(
+    response: Response,
     q: str = Query(..., min_length=2), 
     skip: int = 0, 
     limit: int = 20, 
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
-    # SQL ILIKE search
-    movies = db.query(Movie).filter(Movie.title.ilike(f"%{q}%")).offset(skip).limit(limit).all()
-    return movies
+    # Indexed, ranked search (pg_trgm on Postgres, in-process trigram index elsewhere)
+    # Pages continue from the cursor's (score, id) rather than re-ranking and skipping earlier rows
+    after = None
+    if cursor:
+        score, movie_id = decode_cursor(cursor, 2)
+        try:
+            after = (float(score), int(movie_id))
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    ranked = search_titles(db, q, skip=skip, limit=limit, after=after)
+    if ranked and len(ranked) == limit:
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(ranked[-1][1], ranked[-1][0])
+    movies = db.query(Movie).options(selectinload(Movie.genres)).filter(Movie.id.in_([mid for mid, _ in ranked]))
+    movie_map = {m.id: m for m in movies}
+    return [movie_map[mid] for mid, _ in ranked if mid in movie_map]
+
+@router.get("/movies/autocomplete", response_model=List[MovieSuggestion])
+def autocomplete_movies(
+    q: str = Query(..., min_length=1),
+    limit: int = Query(8, ge=1, le=20),
+    db: Session = Depends(get_db)
+):
+    # Served from memory; the database is only checked for catalog changes every 30s
+    return title_autocomplete.get(db).complete(q, limit=limit)
 
 @router.get("/movies/trending", response_model=List[MovieBase])
 def get_trending(limit: int = 10, db: Session = Depends(get_db)):
     # Simple logic: order by popularity column which is assumed to be updated via daily cron job
-    return db.query(Movie).order_by(Movie.popularity.desc()).limit(limit).all()
+    return db.query(Movie).options(selectinload(Movie.genres)).order_by(Movie.popularity.desc()).limit(limit).all()
 
 @router.get("/movies/{movie_id}", response_model=MovieBase)
 def get_movie_details(movie_id: int, db: Session = Depends(get_db)):
-    movie = db.query(Movie).filter(Movie.id == movie_id).first()
+    movie = db.query(Movie).options(selectinload(Movie.genres)).filter(Movie.id == movie_id).first()
     if not movie:
         raise HTTPException(status_code=404, detail="Movie not found")
     return movie
@@ -38,7 +64,7 @@ def get_movie_details(movie_id: int, db: Session = Depends(get_db)):
 @router.post("/ratings", response_model=RatingResponse)
 def rate_movie(
     rating: RatingCreate, 
-    user: User = Depends(get_current_user), 
+    user: Principal = Depends(get_current_user), 
     db: Session = Depends(get_db)
 ):
     # Check if movie exists
@@ -69,20 +95,41 @@ def rate_movie(
 
 @router.get("/users/me/history", response_model=List[HistoryResponse])
 def get_history(
+    response: Response,
     skip: int = 0, 
     limit: int = 50, 
-    user: User = Depends(get_current_user), 
+    cursor: Optional[str] = None,
+    user: Principal = Depends(get_current_user), 
     db: Session = Depends(get_db)
 ):
-    return db.query(WatchHistory).filter(
+    # Movies and their genres in two batched queries instead of two per row
+    query = db.query(WatchHistory).options(
+        selectinload(WatchHistory.movie).selectinload(Movie.genres)
+    ).filter(
         WatchHistory.user_id == user.id
-    ).order_by(WatchHistory.watched_at.desc()).offset(skip).limit(limit).all()
+    )
+    if cursor:
+        # Keyset: seek past the last (watched_at, id) seen instead of scanning skipped rows
+        watched_at, history_id = decode_cursor(cursor, 2)
+        try:
+            watched_at, history_id = datetime.fromisoformat(watched_at), int(history_id)
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        query = query.filter(or_(
+            WatchHistory.watched_at < watched_at,
+            and_(WatchHistory.watched_at == watched_at, WatchHistory.id < history_id),
+        ))
+    entries = query.order_by(WatchHistory.watched_at.desc(), WatchHistory.id.desc()).offset(skip).limit(limit).all()
+    if entries and len(entries) == limit:
+        last = entries[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(last.watched_at.isoformat(), last.id)
+    return entries
 
 # --- Recommendations ---
 @router.get("/recommendations", response_model=List[MovieBase])
 def get_recommendations(
     limit: int = 10, 
-    user: User = Depends(get_current_user), 
+    user: Principal = Depends(get_current_user), 
     db: Session = Depends(get_db)
 ):
     # Call ML Engine
@@ -90,7 +137,7 @@ def get_recommendations(
     
     # Fetch movie objects in ORDER of recommendations
     # SQL IN clause doesn't guarantee order, so we might need to resort in python or use complex SQL
-    movies = db.query(Movie).filter(Movie.id.in_(recommended_ids)).all()
+    movies = db.query(Movie).options(selectinload(Movie.genres)).filter(Movie.id.in_(recommended_ids)).all()
     
     # Sort locally to match recommendation order
     movie_map = {m.id: m for m in movies}
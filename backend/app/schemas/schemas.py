@@ -19,6 +19,14 @@ class TokenData(BaseModel):
     email: Optional[str] = None
     user_id: Optional[int] = None
 
+class Principal(BaseModel):
+    """The authenticated caller, without the ORM row behind it"""
+    id: int
+    email: str
+
+    class Config:
+        from_attributes = True
+
 # --- Movies ---
 class GenreBase(BaseModel):
     id: int
@@ -36,6 +44,12 @@ class MovieBase(BaseModel):
     class Config:
         from_attributes = True
 
+class MovieSuggestion(BaseModel):
+    id: int
+    title: str
+    release_date: Optional[str] = None
+    poster_path: Optional[str] = None
+
 # --- Ratings ---
 class RatingCreate(BaseModel):
     movie_id: int
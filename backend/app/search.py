@@ -0,0 +1,291 @@
+import bisect
+import math
+import threading
+import time
+import unicodedata
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import func, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from backend.app.models.all_models import Movie
+
+# Relevance dominates; popularity breaks ties between similar matches
+RELEVANCE_WEIGHT = 0.8
+POPULARITY_WEIGHT = 0.2
+POPULARITY_CAP = 1000.0  # Same log scale as HybridRecommender._calculate_tmdb_score
+
+# Trigram overlap a title needs to show up as a fuzzy (typo-tolerant) match
+FUZZY_THRESHOLD = 0.5
+
+
+def normalize(text: str) -> str:
+    """Casefold, strip accents and collapse whitespace so 'Amélie ' matches 'amelie'"""
+    decomposed = unicodedata.normalize("NFKD", text or "")
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return " ".join(stripped.casefold().split())
+
+
+def popularity_score(popularity: float) -> float:
+    return min(math.log1p(max(popularity or 0.0, 0.0)) / math.log1p(POPULARITY_CAP), 1.0)
+
+
+# --- Postgres: pg_trgm GIN index ---
+
+def ensure_search_index(engine: Engine):
+    """Create the trigram index the router's title search uses (Postgres only, idempotent)"""
+    if engine.dialect.name != "postgresql":
+        return
+    with engine.begin() as conn:
+        conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_movies_title_trgm ON movies USING gin (title gin_trgm_ops)"
+        ))
+
+
+def _search_postgres(db: Session, query: str, skip: int, limit: int,
+                     after: Optional[Tuple[float, int]]) -> List[Tuple[int, float]]:
+    # Both predicates are served by ix_movies_title_trgm; <% is word similarity (typos)
+    params = {
+        "q": query, "pattern": f"%{query}%", "rw": RELEVANCE_WEIGHT, "pw": POPULARITY_WEIGHT,
+        "cap": POPULARITY_CAP, "skip": skip, "limit": limit,
+    }
+    keyset = ""
+    if after is not None:
+        keyset = "WHERE score < :after_score OR (score = :after_score AND id > :after_id)"
+        params.update(after_score=after[0], after_id=after[1])
+    rows = db.execute(text(f"""
+        SELECT id, score FROM (
+            SELECT id,
+                   round((word_similarity(:q, title) * :rw
+                   + LEAST(ln(1 + GREATEST(COALESCE(popularity, 0), 0)) / ln(1 + :cap), 1) * :pw)::numeric, 6)
+                   ::float8 AS score
+            FROM movies
+            WHERE title ILIKE :pattern OR :q <% title
+        ) ranked
+        {keyset}
+        ORDER BY score DESC, id
+        OFFSET :skip LIMIT :limit
+    """), params)
+    return [(row.id, float(row.score)) for row in rows]
+
+
+# --- In-process fallback: trigram inverted index ---
+
+class TitleSearchIndex:
+    """Trigram inverted index over normalized titles, for SQLite and tests"""
+
+    N = 3
+
+    def __init__(self, rows: Iterable[Tuple[int, str, float]]):
+        """
+        Args:
+            rows: (movie_id, title, popularity) triples
+        """
+        ids, titles, popularity = [], [], []
+        for movie_id, title, pop in rows:
+            ids.append(movie_id)
+            titles.append(normalize(title))
+            popularity.append(popularity_score(pop))
+        self.ids = np.array(ids, dtype=np.int64)
+        self.titles = titles
+        self.lengths = np.array([max(len(t), 1) for t in titles], dtype=np.float64)
+        self.popularity = np.array(popularity, dtype=np.float64)
+
+        postings: Dict[str, List[int]] = {}
+        for doc, title in enumerate(titles):
+            # Padded so word starts get their own grams (" st", "  s")
+            for gram in self._grams(f"  {title} "):
+                postings.setdefault(gram, []).append(doc)
+        # Docs are appended in order, so every posting list is already sorted
+        self.postings = {gram: np.array(docs, dtype=np.int32) for gram, docs in postings.items()}
+
+    def __len__(self) -> int:
+        return len(self.titles)
+
+    @classmethod
+    def _grams(cls, text: str) -> set:
+        return {text[i:i + cls.N] for i in range(len(text) - cls.N + 1)}
+
+    def search(self, query: str, skip: int = 0, limit: int = 20,
+               after: Optional[Tuple[float, int]] = None) -> List[Tuple[int, float]]:
+        """
+        Rank titles by relevance and popularity
+
+        Substring matches rank above fuzzy ones: exact title, then prefix, then
+        word start, then anywhere. Queries shorter than three characters match
+        word starts only.
+
+        Args:
+            after: (score, movie_id) of the last result already seen; only
+                results ranked after it are returned (keyset pagination)
+
+        Returns:
+            (movie_id, score) pairs, best first, ties broken by movie_id
+        """
+        q = normalize(query)
+        if not q:
+            return []
+        wanted = skip + limit
+
+        if len(q) < self.N:
+            grams = {f" {q}" if len(q) == 2 else f"  {q}"}
+        else:
+            grams = self._grams(q)
+        lists = sorted((self.postings.get(g, np.empty(0, dtype=np.int32)) for g in grams), key=len)
+
+        # Exact substring hits: docs holding every query gram, then verified
+        candidates = lists[0]
+        for docs in lists[1:]:
+            if not len(candidates):
+                break
+            candidates = np.intersect1d(candidates, docs, assume_unique=True)
+        hit_docs, hit_relevance = self._substring_hits(q, candidates)
+        ids, scores = self._ranked_after(hit_docs, hit_relevance, after)
+
+        # Typo-tolerant fill when substring hits cannot fill the page
+        if len(ids) < wanted and len(q) >= self.N and len(lists) > 1:
+            overlap = np.bincount(np.concatenate(lists), minlength=len(self.titles))
+            overlap[hit_docs] = 0
+            fuzzy = np.flatnonzero(overlap >= math.ceil(FUZZY_THRESHOLD * len(grams)))
+            # At most 0.25 relevance, so fuzzy matches always rank below substring ones
+            fuzzy_ids, fuzzy_scores = self._ranked_after(fuzzy, 0.25 * overlap[fuzzy] / len(grams), after)
+            ids = np.concatenate([ids, fuzzy_ids])
+            scores = np.concatenate([scores, fuzzy_scores])
+
+        order = np.lexsort((ids, -scores))[skip:wanted]
+        return [(int(ids[i]), float(scores[i])) for i in order]
+
+    def _ranked_after(self, docs: np.ndarray, relevance: np.ndarray,
+                      after: Optional[Tuple[float, int]]) -> Tuple[np.ndarray, np.ndarray]:
+        """Movie IDs and final scores for docs, keeping only those ranked after the cursor"""
+        # Rounded so scores handed out in cursors compare exactly
+        scores = np.round(relevance * RELEVANCE_WEIGHT + self.popularity[docs] * POPULARITY_WEIGHT, 6)
+        ids = self.ids[docs]
+        if after is not None:
+            later = (scores < after[0]) | ((scores == after[0]) & (ids > after[1]))
+            ids, scores = ids[later], scores[later]
+        return ids, scores
+
+    def _substring_hits(self, q: str, candidates: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Verified substring matches among candidates, with relevance by match position"""
+        titles = self.titles
+        word = f" {q}"
+        # 2 = title starts with q, 1 = a word starts with q, 0 = anywhere, -1 = no match
+        kinds = np.array([
+            2 if title.startswith(q) else 1 if word in title else 0 if q in title else -1
+            for title in map(titles.__getitem__, candidates.tolist())
+        ], dtype=np.int8)
+        matched = kinds >= 0
+        docs = candidates[matched].astype(np.int64)
+        kinds = kinds[matched]
+
+        # Shorter titles containing the query are closer matches
+        closeness = 0.1 * len(q) / self.lengths[docs]
+        relevance = np.choose(kinds, (0.55, 0.7, 0.85)) + closeness
+        relevance[self.lengths[docs] == len(q)] = 1.0
+        return docs, relevance
+
+
+class TitleAutocomplete:
+    """Sorted array of normalized title and word-start keys, completed with bisect"""
+
+    def __init__(self, rows: Iterable[Tuple]):
+        """
+        Args:
+            rows: (movie_id, title, popularity, release_date, poster_path) tuples
+        """
+        self.movies: List[Dict] = []
+        keyed = []
+        for movie_id, title, pop, release_date, poster_path in rows:
+            doc = len(self.movies)
+            self.movies.append({"id": movie_id, "title": title, "release_date": release_date,
+                                "poster_path": poster_path})
+            key = normalize(title)
+            # Whole title first, then every later word start ("wars" -> Star Wars)
+            keyed.append((key, doc, 1.0 + popularity_score(pop)))
+            words = key.split(" ")
+            for i in range(1, len(words)):
+                keyed.append((" ".join(words[i:]), doc, popularity_score(pop)))
+        keyed.sort()
+        self.keys = [key for key, _, _ in keyed]
+        self.docs = np.array([doc for _, doc, _ in keyed], dtype=np.int32)
+        # Title starts outrank word starts; popularity orders within each
+        self.rank = np.array([rank for _, _, rank in keyed], dtype=np.float64)
+
+    def __len__(self) -> int:
+        return len(self.movies)
+
+    def complete(self, prefix: str, limit: int = 8) -> List[Dict]:
+        """Movies whose title or a word in it starts with prefix, best first"""
+        p = normalize(prefix)
+        if not p or limit <= 0:
+            return []
+        lo = bisect.bisect_left(self.keys, p)
+        # Every key starting with p sorts before p + the highest code point
+        hi = bisect.bisect_left(self.keys, p + "\U0010ffff", lo)
+        if lo == hi:
+            return []
+
+        rank, range_docs, size = self.rank[lo:hi], self.docs[lo:hi], hi - lo
+        # One movie can match through several keys (title plus word starts), so
+        # widen the window until it holds `limit` distinct movies or every match
+        top = min(limit * 2, size)
+        while True:
+            if top < size:
+                best = np.argpartition(-rank, top - 1)[:top]
+            else:
+                best = np.arange(size)
+            docs = range_docs[best]
+            order = np.lexsort((docs, -rank[best]))
+
+            seen, results = set(), []
+            for doc in docs[order].tolist():
+                if doc not in seen:
+                    seen.add(doc)
+                    results.append(self.movies[doc])
+                    if len(results) == limit:
+                        return results
+            if top == size:
+                return results
+            top = min(top * 2, size)
+
+
+class CatalogSnapshot:
+    """Process-wide structure built from the movies table, rebuilt when the table changes"""
+
+    check_interval = 30.0
+
+    def __init__(self, build, *columns):
+        self._build = build
+        self._columns = columns
+        self._value = None
+        self._fingerprint = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def get(self, db: Session):
+        with self._lock:
+            if self._value is not None and time.monotonic() - self._checked_at < self.check_interval:
+                return self._value
+            self._checked_at = time.monotonic()
+            fingerprint = tuple(db.query(func.count(Movie.id), func.max(Movie.updated_at)).one())
+            if self._value is None or fingerprint != self._fingerprint:
+                self._value = self._build(db.query(*self._columns))
+                self._fingerprint = fingerprint
+            return self._value
+
+
+title_index = CatalogSnapshot(TitleSearchIndex, Movie.id, Movie.title, Movie.popularity)
+title_autocomplete = CatalogSnapshot(TitleAutocomplete, Movie.id, Movie.title, Movie.popularity,
+                                     Movie.release_date, Movie.poster_path)
+
+
+def search_titles(db: Session, query: str, skip: int = 0, limit: int = 20,
+                  after: Optional[Tuple[float, int]] = None) -> List[Tuple[int, float]]:
+    """Ranked (movie_id, score) pairs for a title query, on whichever backend db uses; see TitleSearchIndex.search"""
+    if db.bind.dialect.name == "postgresql":
+        return _search_postgres(db, query, skip, limit, after)
+    return title_index.get(db).search(query, skip, limit, after)
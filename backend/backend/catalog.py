@@ -0,0 +1,151 @@
+"""
+Local movie catalog
+In-memory view of the movies synced by scripts/sync_catalog.py, so candidate
+generation and scoring never call TMDB on the request path
+
+Built by Ruhulalemeen Mulla
+"""
+
+import json
+import logging
+import threading
+import time
+from typing import Dict, List, Optional
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+
+class LocalCatalog:
+    """Synced movies held in memory, shaped like TMDBFusion.enrich_movie_data output"""
+
+    MOVIES_SQL = text('''
+        SELECT id, tmdb_id, movielens_id, title, overview, release_date, poster_path,
+               backdrop_path, vote_average, vote_count, popularity, runtime, tagline,
+               budget, revenue, director, top_cast
+        FROM movies
+        WHERE tmdb_id IS NOT NULL
+    ''')
+    GENRES_SQL = text('''
+        SELECT mg.movie_id, g.name
+        FROM movie_genres mg JOIN genres g ON g.id = mg.genre_id
+        ORDER BY mg.movie_id, g.name
+    ''')
+    FINGERPRINT_SQL = text('SELECT COUNT(*), MAX(updated_at) FROM movies')
+
+    def __init__(self, engine, reload_interval: float = 300.0):
+        """
+        Args:
+            engine: SQLAlchemy engine or database URL holding the movies/genres tables
+            reload_interval: Minimum seconds between change checks in maybe_reload
+        """
+        self.engine: Engine = create_engine(engine) if isinstance(engine, str) else engine
+        self.reload_interval = reload_interval
+
+        self._lock = threading.Lock()
+        self._movies: Dict[int, Dict] = {}
+        self._by_popularity: List[Dict] = []
+        self._titles: List[str] = []
+        self._fingerprint = None
+        self._checked_at = 0.0
+        # Bumped whenever the loaded contents change; cheap cache-busting key
+        self.version = 0
+
+    def __len__(self) -> int:
+        return len(self._movies)
+
+    def load(self) -> int:
+        """Read the whole catalog and swap it in; returns the number of movies"""
+        with self.engine.connect() as conn:
+            fingerprint = tuple(conn.execute(self.FINGERPRINT_SQL).one())
+            rows = conn.execute(self.MOVIES_SQL).mappings().all()
+            genres: Dict[int, List[str]] = {}
+            for movie_id, name in conn.execute(self.GENRES_SQL):
+                genres.setdefault(movie_id, []).append(name)
+
+        movies = {row['tmdb_id']: self._to_movie(row, genres.get(row['id'], [])) for row in rows}
+        by_popularity = sorted(movies.values(), key=lambda m: m['popularity'] or 0, reverse=True)
+
+        with self._lock:
+            self._movies = movies
+            self._by_popularity = by_popularity
+            self._titles = [m['title'].casefold() for m in by_popularity]
+            self._fingerprint = fingerprint
+            self._checked_at = time.monotonic()
+            self.version += 1
+
+        logger.info(f"Loaded {len(movies)} movies from the local catalog")
+        return len(movies)
+
+    def maybe_reload(self) -> bool:
+        """Reload if the movies table changed since the last load (checked at most every reload_interval)"""
+        if self._fingerprint is not None and time.monotonic() - self._checked_at < self.reload_interval:
+            return False
+        self._checked_at = time.monotonic()
+
+        with self.engine.connect() as conn:
+            fingerprint = tuple(conn.execute(self.FINGERPRINT_SQL).one())
+        if fingerprint == self._fingerprint:
+            return False
+        self.load()
+        return True
+
+    @staticmethod
+    def _to_movie(row, genres: List[str]) -> Dict:
+        cast = row['top_cast']
+        if isinstance(cast, str):
+            # JSON columns come back as text on SQLite
+            cast = json.loads(cast)
+        return {
+            'id': row['tmdb_id'],
+            'catalog_id': row['id'],
+            'movielens_id': row['movielens_id'],
+            'title': row['title'],
+            'overview': row['overview'] or '',
+            'release_date': row['release_date'] or '',
+            'poster_path': row['poster_path'],
+            'vote_average': row['vote_average'] or 0,
+            'popularity': row['popularity'] or 0,
+            'genres': genres,
+            'tmdb_data': {
+                'overview': row['overview'] or '',
+                'release_date': row['release_date'] or '',
+                'runtime': row['runtime'],
+                'vote_average': row['vote_average'] or 0,
+                'vote_count': row['vote_count'] or 0,
+                'popularity': row['popularity'] or 0,
+                'budget': row['budget'] or 0,
+                'revenue': row['revenue'] or 0,
+                'tagline': row['tagline'] or '',
+                'poster_path': row['poster_path'],
+                'backdrop_path': row['backdrop_path'],
+                'director': row['director'],
+                'cast': cast or [],
+            }
+        }
+
+    def get(self, tmdb_id: int) -> Optional[Dict]:
+        """Look up one movie by TMDB ID"""
+        return self._movies.get(tmdb_id)
+
+    def popular(self, limit: int = 200) -> List[Dict]:
+        """Most popular movies first"""
+        return self._by_popularity[:limit]
+
+    def search(self, query: str, limit: int = 200) -> List[Dict]:
+        """Case-insensitive title substring match, most popular first"""
+        q = query.strip().casefold()
+        if not q:
+            return []
+        # Read both lists from one swap so they stay aligned during a reload
+        with self._lock:
+            movies, titles = self._by_popularity, self._titles
+        results = []
+        for movie, title in zip(movies, titles):
+            if q in title:
+                results.append(movie)
+                if len(results) >= limit:
+                    break
+        return results
@@ -0,0 +1,145 @@
+"""
+Background catalog refresher
+Periodically prefetches and enriches trending and popular TMDB pages into an
+in-memory snapshot that route handlers can answer from
+
+Built by Ruhulalemeen Mulla
+"""
+
+import asyncio
+import logging
+import time
+from typing import Dict, List, Optional
+
+from .tmdb_client import TMDBClient, TMDBError
+from .tmdb_scheduler import BACKGROUND
+
+logger = logging.getLogger(__name__)
+
+
+def details_summary(details: Dict) -> Dict:
+    """The fields list results lack, taken from a details response with credits appended"""
+    credits = details.get('credits') or {}
+    directors = [c['name'] for c in credits.get('crew', []) if c.get('job') == 'Director']
+    return {
+        'genres': [g['name'] for g in details.get('genres', [])],
+        'runtime': details.get('runtime'),
+        'tagline': details.get('tagline', ''),
+        'director': directors[0] if directors else None,
+        'cast': [c['name'] for c in credits.get('cast', [])[:5]],
+    }
+
+
+class CatalogRefresher:
+    """Keeps a fresh, enriched snapshot of the trending and popular feeds"""
+
+    FEEDS = {
+        'trending': '/trending/movie/week',
+        'popular': '/movie/popular',
+    }
+
+    def __init__(self, client: TMDBClient, pages: int = 3, interval: float = 600.0,
+                 max_staleness: float = 1800.0):
+        """
+        Args:
+            client: Shared async TMDB client
+            pages: Pages of each feed to prefetch
+            interval: Seconds between refreshes
+            max_staleness: Snapshot pages older than this are not served
+        """
+        self.client = client
+        self.pages = pages
+        self.interval = interval
+        self.max_staleness = max_staleness
+
+        # feed -> page -> {'data': response, 'fetched_at': monotonic time};
+        # replaced wholesale on refresh so readers never see a half-built one
+        self._snapshot: Dict[str, Dict[int, Dict]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.last_refresh: Optional[float] = None
+
+    def get_page(self, feed: str, page: int = 1) -> Optional[Dict]:
+        """Return a prefetched page if it is within max_staleness, else None"""
+        entry = self._snapshot.get(feed, {}).get(page)
+        if entry is None or time.monotonic() - entry['fetched_at'] > self.max_staleness:
+            return None
+        return entry['data']
+
+    async def refresh(self):
+        """Fetch every feed page, enrich the results and swap in a new snapshot"""
+        fetched = await asyncio.gather(*[
+            self._fetch_page(feed, page)
+            for feed in self.FEEDS
+            for page in range(1, self.pages + 1)
+        ])
+
+        # Fetch details once per distinct movie, even if it is in several feeds
+        copies: Dict[int, List[Dict]] = {}
+        for _, _, data in fetched:
+            for movie in (data or {}).get('results', []):
+                copies.setdefault(movie['id'], []).append(movie)
+        await asyncio.gather(*[self._enrich(movie_id, movies) for movie_id, movies in copies.items()])
+
+        snapshot = {feed: dict(pages) for feed, pages in self._snapshot.items()}
+        now = time.monotonic()
+        for feed, page, data in fetched:
+            # Failed pages keep their previous entry until it goes stale
+            if data:
+                snapshot.setdefault(feed, {})[page] = {'data': data, 'fetched_at': now}
+        self._snapshot = snapshot
+        self.last_refresh = now
+
+    async def _fetch_page(self, feed: str, page: int):
+        try:
+            data = await self.client.get(self.FEEDS[feed], {"page": page}, priority=BACKGROUND)
+            # Copy so enrichment never mutates a response shared with other callers
+            data = {**data, 'results': [dict(m) for m in data.get('results', [])]}
+            return feed, page, data
+        except TMDBError as e:
+            logger.error(f"Error prefetching {feed} page {page}: {e}")
+            return feed, page, None
+
+    async def _enrich(self, movie_id: int, movies: List[Dict]):
+        try:
+            details = await self.client.get(
+                f"/movie/{movie_id}", {"append_to_response": "credits"}, priority=BACKGROUND
+            )
+        except TMDBError as e:
+            logger.warning(f"Error enriching movie {movie_id}: {e}")
+            return
+
+        extra = details_summary(details)
+        for movie in movies:
+            movie.update(extra)
+
+    async def run(self):
+        """Refresh forever, every interval seconds"""
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error(f"Catalog refresh failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        """Start the refresh loop as a background task on the running loop"""
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        """Cancel the refresh loop"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def status(self) -> Dict:
+        """Snapshot ages per feed, for debugging"""
+        now = time.monotonic()
+        return {
+            feed: {page: round(now - entry['fetched_at'], 1) for page, entry in pages.items()}
+            for feed, pages in self._snapshot.items()
+        }
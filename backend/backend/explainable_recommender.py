@@ -5,19 +5,33 @@ Provides detailed explanations for why each movie is recommended
 Built by Ruhulalemeen Mulla
 """
 
-from typing import List, Dict, Optional, Tuple
-from collections import defaultdict
+from typing import List, Dict, Optional
 import logging
 
+import numpy as np
+
+from .explanation_cache import ExplanationCache
+from .neighbor_index import NeighborIndex
+from .talent_index import TalentIndex
+from .user_history import bits_to_mask, genre_weight_vector, masks_to_matrix
+
 logger = logging.getLogger(__name__)
 
 
 class ExplainableRecommender:
     """Generates human-readable explanations for recommendations"""
     
-    def __init__(self, history_manager, tmdb_fusion):
+    def __init__(self, history_manager, tmdb_fusion, talent_index: Optional[TalentIndex] = None,
+                 explanation_cache: Optional[ExplanationCache] = None,
+                 neighbor_index: Optional[NeighborIndex] = None):
         self.history_manager = history_manager
         self.tmdb = tmdb_fusion
+        # Offline director/cast IDs; talent reasons need no TMDB calls when set
+        self.talent_index = talent_index
+        # Finished explanations, reused until the profile or movie metadata changes
+        self.explanation_cache = explanation_cache
+        # Trained CF neighbors; "because you liked X" reasons come from these when set
+        self.neighbor_index = neighbor_index
     
     def explain_recommendation(self, user_id: str, recommended_movie: Dict) -> Dict:
         """
@@ -30,10 +44,71 @@ class ExplainableRecommender:
         Returns:
             Dict with explanation components
         """
-        # Get user's profile
+        return self.explain_many(user_id, [recommended_movie])[0]
+    
+    def explain_many(self, user_id: str, movies: List[Dict]) -> List[Dict]:
+        """
+        Explain a page of recommendations, loading and aggregating the profile once
+        
+        Args:
+            user_id: User identifier
+            movies: Movie dicts with genres, tmdb_data, etc.
+        
+        Returns:
+            One explanation per movie, in the same order (cached ones are
+            shared, so callers must not mutate them)
+        """
+        session = self.session(user_id)
+        return [session.explain(movie) for movie in movies]
+    
+    def session(self, user_id: str) -> "ExplanationSession":
+        """Explain movies for one user as they become available, loading the profile at most once"""
+        return ExplanationSession(self, user_id)
+    
+    def _build_user_context(self, user_id: str) -> Dict:
+        """Load the user's profile and precompute every lookup the analyzers need"""
         liked_movies = self.history_manager.get_liked_movies(user_id)
         watch_history = self.history_manager.get_watch_history(user_id, limit=20)
+        genres = self.history_manager.genres
         
+        # Count genre preferences from history (likes weighted double)
+        liked_masks = [genres.mask_of(m) for m in liked_movies]
+        genre_counts = genre_weight_vector(liked_masks, (genres.mask_of(m) for m in watch_history))
+        preferred_mask = bits_to_mask(np.flatnonzero(genre_counts))
+        
+        # Talent from liked movies
+        liked_directors = set()
+        liked_actors = set()
+        for liked_movie in liked_movies:
+            liked_tmdb = liked_movie.get('tmdb_data', {})
+            if liked_tmdb.get('director'):
+                liked_directors.add(liked_tmdb['director'])
+            liked_actors.update(liked_tmdb.get('cast', []))
+        
+        liked_talent = None
+        if self.talent_index is not None:
+            liked_talent = self.talent_index.liked_talent(
+                user_id, (m['movie_id'] for m in liked_movies)
+            )
+        
+        liked_ids = None
+        if self.neighbor_index is not None:
+            liked_ids = self.neighbor_index.liked_array(m['movie_id'] for m in liked_movies)
+        
+        return {
+            'liked_titles': [m.get('title') for m in liked_movies],
+            'liked_titles_by_id': {m['movie_id']: m.get('title') for m in liked_movies},
+            'liked_ids': liked_ids,
+            'liked_matrix': masks_to_matrix(liked_masks),
+            'genre_counts': genre_counts,
+            'preferred_mask': preferred_mask,
+            'liked_directors': liked_directors,
+            'liked_actors': liked_actors,
+            'liked_talent': liked_talent,
+        }
+    
+    def _explain(self, context: Dict, recommended_movie: Dict) -> Dict:
+        """Build one explanation against a precomputed user context"""
         explanation = {
             'movie_title': recommended_movie.get('title'),
             'reasons': [],
@@ -41,25 +116,22 @@ class ExplainableRecommender:
             'similar_movies': [],
             'detailed_explanation': ''
         }
+        movie_mask = self.history_manager.genres.mask_of(recommended_movie)
         
         # Reason 1: Genre match
-        genre_reason = self._analyze_genre_match(
-            recommended_movie, liked_movies, watch_history
-        )
+        genre_reason = self._analyze_genre_match(movie_mask, context)
         if genre_reason:
             explanation['reasons'].append(genre_reason)
         
         # Reason 2: Director/Actor match
-        talent_reason = self._analyze_talent_match(
-            recommended_movie, liked_movies
-        )
+        talent_reason = self._analyze_talent_match(recommended_movie, context)
         if talent_reason:
             explanation['reasons'].append(talent_reason)
         
-        # Reason 3: Similar to liked movies
-        similar_reason = self._analyze_similarity(
-            recommended_movie, liked_movies
-        )
+        # Reason 3: Similar to liked movies (CF neighbors when trained, else genre overlap)
+        similar_reason = self._analyze_neighbors(recommended_movie, context)
+        if similar_reason is None:
+            similar_reason = self._analyze_similarity(movie_mask, context)
         if similar_reason:
             explanation['reasons'].append(similar_reason)
             explanation['similar_movies'] = similar_reason.get('examples', [])
@@ -88,31 +160,26 @@ class ExplainableRecommender:
         
         return explanation
     
-    def _analyze_genre_match(self, movie: Dict, liked: List[Dict], 
-                            watched: List[Dict]) -> Optional[Dict]:
+    def _analyze_genre_match(self, movie_mask: int, context: Dict) -> Optional[Dict]:
         """Analyze genre-based recommendation reason"""
-        movie_genres = set(movie.get('genres', []))
-        
-        # Count genre preferences from history
-        genre_counts = defaultdict(int)
-        for m in liked:
-            for g in m.get('genres', []):
-                genre_counts[g] += 2  # Weighted
-        for m in watched:
-            for g in m.get('genres', []):
-                genre_counts[g] += 1
-        
-        matching_genres = movie_genres & set(genre_counts.keys())
-        
-        if matching_genres:
-            top_match = max(matching_genres, key=lambda g: genre_counts[g])
-            watch_count = genre_counts[top_match]
+        genres = self.history_manager.genres
+        genre_counts = context['genre_counts']
+        matching_mask = movie_mask & context['preferred_mask']
+        
+        if matching_mask:
+            matching_genres = genres.decode(matching_mask)
+            top_bit = max(
+                (b for b in range(matching_mask.bit_length()) if matching_mask >> b & 1),
+                key=lambda b: genre_counts[b]
+            )
+            top_match = genres.decode(1 << top_bit)[0]
+            watch_count = int(genre_counts[top_bit])
             
             return {
                 'type': 'genre_match',
-                'strength': min(len(matching_genres) / len(movie_genres), 1.0),
+                'strength': min(matching_mask.bit_count() / movie_mask.bit_count(), 1.0),
                 'details': {
-                    'matching_genres': list(matching_genres),
+                    'matching_genres': matching_genres,
                     'top_genre': top_match,
                     'watch_count': watch_count
                 },
@@ -120,29 +187,20 @@ class ExplainableRecommender:
             }
         return None
     
-    def _analyze_talent_match(self, movie: Dict, liked: List[Dict]) -> Optional[Dict]:
+    def _analyze_talent_match(self, movie: Dict, context: Dict) -> Optional[Dict]:
         """Analyze director/actor match"""
+        talent = self.talent_index.talent_of(movie.get('id')) if self.talent_index else None
+        if talent is not None and context['liked_talent'] is not None:
+            return self._analyze_indexed_talent(talent, context['liked_talent'])
+        
         tmdb_data = movie.get('tmdb_data', {})
         director = tmdb_data.get('director')
-        cast = set(tmdb_data.get('cast', []))
+        cast = tmdb_data.get('cast', [])
         
         if not director and not cast:
             return None
         
-        # Find matching talent from liked movies
-        liked_directors = []
-        liked_actors = set()
-        
-        for liked_movie in liked:
-            liked_tmdb = liked_movie.get('tmdb_data', {})
-            if liked_tmdb.get('director'):
-                liked_directors.append(liked_tmdb['director'])
-            liked_actors.update(liked_tmdb.get('cast', []))
-        
-        matching_actors = cast & liked_actors
-        director_match = director in liked_directors
-        
-        if director_match:
+        if director and director in context['liked_directors']:
             return {
                 'type': 'director_match',
                 'strength': 0.9,
@@ -150,60 +208,101 @@ class ExplainableRecommender:
                 'message': f"Directed by {director}, whose work you've enjoyed before"
             }
         
+        matching_actors = [a for a in cast if a in context['liked_actors']]
         if matching_actors:
-            actor = list(matching_actors)[0]
+            actor = matching_actors[0]
             return {
                 'type': 'actor_match',
                 'strength': 0.7,
-                'details': {'actors': list(matching_actors)},
+                'details': {'actors': matching_actors},
                 'message': f"Features {actor}, who you liked in other movies"
             }
         
         return None
     
-    def _analyze_similarity(self, movie: Dict, liked: List[Dict]) -> Optional[Dict]:
-        """Find similar movies user has liked"""
-        if not liked:
-            return None
-        
-        movie_genres = set(movie.get('genres', []))
-        
-        # Find most similar liked movie
-        similarities = []
-        for liked_movie in liked:
-            liked_genres = set(liked_movie.get('genres', []))
-            if not movie_genres or not liked_genres:
-                continue
-            
-            # Jaccard similarity
-            intersection = len(movie_genres & liked_genres)
-            union = len(movie_genres | liked_genres)
-            similarity = intersection / union if union > 0 else 0
-            
-            if similarity > 0.3:  # Threshold
-                similarities.append({
-                    'title': liked_movie.get('title'),
-                    'similarity': similarity,
-                    'common_genres': list(movie_genres & liked_genres)
-                })
-        
-        if similarities:
-            similarities.sort(key=lambda x: x['similarity'], reverse=True)
-            top_similar = similarities[0]
-            
+    def _analyze_indexed_talent(self, talent: Dict, liked_talent: Dict) -> Optional[Dict]:
+        """Director/actor match by ID against the user's liked-talent counts"""
+        liked_directors = liked_talent['directors']
+        for director_id in talent['directors']:
+            if director_id in liked_directors:
+                director = self.talent_index.name(director_id)
+                return {
+                    'type': 'director_match',
+                    'strength': 0.9,
+                    'details': {'director': director, 'liked_count': liked_directors[director_id]},
+                    'message': f"Directed by {director}, whose work you've enjoyed before"
+                }
+        
+        liked_actors = liked_talent['actors']
+        matching_actors = [self.talent_index.name(a) for a in talent['cast'] if a in liked_actors]
+        if matching_actors:
             return {
-                'type': 'similar_to_liked',
-                'strength': top_similar['similarity'],
-                'details': {
-                    'reference_movie': top_similar['title'],
-                    'common_genres': top_similar['common_genres']
-                },
-                'examples': [s['title'] for s in similarities[:3]],
-                'message': f"Similar to '{top_similar['title']}' which you liked"
+                'type': 'actor_match',
+                'strength': 0.7,
+                'details': {'actors': matching_actors},
+                'message': f"Features {matching_actors[0]}, who you liked in other movies"
             }
         
         return None
     
+    def _analyze_neighbors(self, movie: Dict, context: Dict) -> Optional[Dict]:
+        """Liked movies among the recommendation's collaborative-filtering neighbors"""
+        if self.neighbor_index is None:
+            return None
+        contributors = self.neighbor_index.contributors(movie.get('id'), context['liked_ids'])
+        if not contributors:
+            return None
+        
+        titles = context['liked_titles_by_id']
+        top_id, top_score = contributors[0]
+        return {
+            'type': 'similar_to_liked',
+            'strength': min(top_score, 1.0),
+            'details': {
+                'reference_movie': titles.get(top_id),
+                'method': 'collaborative',
+                'contributors': [
+                    {'movie_id': movie_id, 'title': titles.get(movie_id), 'similarity': round(score, 4)}
+                    for movie_id, score in contributors
+                ]
+            },
+            'examples': [titles.get(movie_id) for movie_id, _ in contributors],
+            'message': f"Because you liked '{titles.get(top_id)}'"
+        }
+    
+    def _analyze_similarity(self, movie_mask: int, context: Dict) -> Optional[Dict]:
+        """Find similar movies user has liked"""
+        liked_matrix = context['liked_matrix']
+        if not movie_mask or not len(liked_matrix):
+            return None
+        
+        # Jaccard similarity against every liked movie at once
+        movie_row = masks_to_matrix([movie_mask])[0]
+        intersection = (liked_matrix & movie_row).sum(axis=1)
+        union = (liked_matrix | movie_row).sum(axis=1)
+        similarity = np.divide(intersection, union, out=np.zeros(len(liked_matrix)), where=union > 0)
+        
+        matches = np.flatnonzero(similarity > 0.3)  # Threshold
+        if not len(matches):
+            return None
+        matches = matches[np.argsort(-similarity[matches], kind='stable')]
+        
+        genres = self.history_manager.genres
+        top = int(matches[0])
+        common_mask = bits_to_mask(np.flatnonzero(liked_matrix[top] & movie_row))
+        titles = context['liked_titles']
+        
+        return {
+            'type': 'similar_to_liked',
+            'strength': float(similarity[top]),
+            'details': {
+                'reference_movie': titles[top],
+                'common_genres': genres.decode(common_mask)
+            },
+            'examples': [titles[i] for i in matches[:3]],
+            'message': f"Similar to '{titles[top]}' which you liked"
+        }
+    
     def _analyze_quality(self, movie: Dict) -> Optional[Dict]:
         """Analyze movie quality indicators"""
         tmdb_data = movie.get('tmdb_data', {})
@@ -282,6 +381,43 @@ class ExplainableRecommender:
         return text
 
 
+class ExplanationSession:
+    """One user's explanations, computed one movie at a time against a shared context"""
+    
+    def __init__(self, explainer: ExplainableRecommender, user_id: str):
+        self.explainer = explainer
+        self.user_id = user_id
+        self._context = None
+        
+        if explainer.explanation_cache is not None:
+            # The taste profile is cached, so its version is a cheap staleness check
+            self._profile_version = explainer.history_manager.get_taste_profile(user_id)['version']
+            self._index_versions = (
+                explainer.talent_index.version if explainer.talent_index else None,
+                explainer.neighbor_index.version if explainer.neighbor_index else None,
+            )
+    
+    def explain(self, movie: Dict) -> Dict:
+        """Explain one movie; cached explanations are shared, so callers must not mutate them"""
+        cache = self.explainer.explanation_cache
+        if cache is None:
+            return self.explainer._explain(self._get_context(), movie)
+        
+        key = (self.user_id, movie.get('id'), self._profile_version,
+               cache.metadata_version(movie, self._index_versions))
+        explanation = cache.get(key)
+        if explanation is None:
+            explanation = self.explainer._explain(self._get_context(), movie)
+            cache.set(key, explanation)
+        return explanation
+    
+    def _get_context(self) -> Dict:
+        # Only built if something misses the cache
+        if self._context is None:
+            self._context = self.explainer._build_user_context(self.user_id)
+        return self._context
+
+
 # Example usage
 if __name__ == "__main__":
     from .user_history import UserHistoryManager
@@ -0,0 +1,120 @@
+"""
+Explanation cache
+Generated explanations keyed by user, movie, profile version and movie
+metadata version, with LRU eviction under a memory cap
+
+Built by Ruhulalemeen Mulla
+"""
+
+import json
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Hashable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class ExplanationCache:
+    """LRU of explanation dicts, bounded by approximate size in bytes"""
+
+    def __init__(self, max_bytes: int = 32 * 1024 * 1024):
+        """
+        Args:
+            max_bytes: Approximate memory budget (serialized size of the entries)
+        """
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        # key -> (explanation, size)
+        self._entries: "OrderedDict[Tuple, Tuple[Dict, int]]" = OrderedDict()
+        self._keys_by_user: Dict[str, Set[Tuple]] = {}
+        self._bytes = 0
+        self._counters = {'hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0, 'invalidations': 0}
+
+    @staticmethod
+    def metadata_version(movie: Dict, extra: Hashable = None) -> int:
+        """Fingerprint of the movie fields explanations read; extra folds in e.g. the talent index version"""
+        tmdb_data = movie.get('tmdb_data') or {}
+        return hash((
+            movie.get('title'),
+            movie.get('genre_mask'),
+            tuple(movie.get('genres') or ()),
+            tmdb_data.get('director'),
+            tuple(tmdb_data.get('cast') or ()),
+            tmdb_data.get('vote_average'),
+            tmdb_data.get('vote_count'),
+            tmdb_data.get('popularity'),
+            extra,
+        ))
+
+    def get(self, key: Tuple) -> Optional[Dict]:
+        """Look up (user_id, movie_id, profile_version, metadata_version); callers must not mutate the result"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._counters['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._counters['hits'] += 1
+            return entry[0]
+
+    def set(self, key: Tuple, explanation: Dict):
+        """Store an explanation, evicting least recently used entries over the budget"""
+        size = len(json.dumps(explanation, default=str))
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (explanation, size)
+            self._keys_by_user.setdefault(key[0], set()).add(key)
+            self._bytes += size
+            self._counters['stores'] += 1
+
+            while self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self._counters['evictions'] += 1
+
+    def _remove(self, key: Tuple):
+        _, size = self._entries.pop(key)
+        self._bytes -= size
+        user_keys = self._keys_by_user.get(key[0])
+        if user_keys is not None:
+            user_keys.discard(key)
+            if not user_keys:
+                del self._keys_by_user[key[0]]
+
+    def invalidate_user(self, user_id: str):
+        """Drop every cached explanation for a user"""
+        with self._lock:
+            for key in list(self._keys_by_user.get(user_id, ())):
+                self._remove(key)
+                self._counters['invalidations'] += 1
+
+    def on_history_events(self, events: List[Dict]):
+        """UserHistoryManager listener: a user's old explanations can never be hit again, so free them"""
+        for user_id in {event['user_id'] for event in events}:
+            self.invalidate_user(user_id)
+
+    def attach(self, history_manager):
+        """Subscribe to a history manager (or write buffer) so writes invalidate its users"""
+        history_manager.subscribe(self.on_history_events)
+
+    def clear(self):
+        """Drop every cached explanation"""
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_user.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict:
+        """Hit/miss counters, hit rate and current size"""
+        with self._lock:
+            counters = dict(self._counters)
+            counters['entries'] = len(self._entries)
+            counters['bytes'] = self._bytes
+        lookups = counters['hits'] + counters['misses']
+        counters['hit_rate'] = round(counters['hits'] / lookups, 4) if lookups else 0.0
+        return counters
@@ -0,0 +1,267 @@
+"""
+Write-behind buffer for watch and like events
+Queues history writes in memory and flushes them to SQLite in batches
+
+Built by Ruhulalemeen Mulla
+"""
+
+import atexit
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from collections import Counter
+from numbers import Real
+from typing import List, Dict, Optional
+
+from .user_history import UserHistoryManager
+
+logger = logging.getLogger(__name__)
+
+EVENT_TYPES = ('watch', 'like', 'unlike')
+# Attempts at a batch that hits a locked database before it is requeued
+TRANSIENT_RETRIES = 3
+
+
+class HistoryWriteBuffer:
+    """
+    Batches UserHistoryManager writes into few transactions
+
+    Events are queued in a bounded in-memory queue and applied with
+    UserHistoryManager.apply_events when batch_size events are waiting or
+    flush_interval seconds have passed. When the queue is full, submitters
+    block for up to submit_timeout seconds and then get queue.Full.
+    Malformed events are rejected by submit with ValueError.
+
+    A batch that hits a locked database is retried, then requeued for the
+    next flush. A batch that fails otherwise is split until the failing
+    events are isolated, so only those are dropped.
+
+    Reads go through the buffer so a user always sees their own writes: if
+    that user still has queued events, they are flushed before the read.
+    The buffer exposes the same read/write methods as UserHistoryManager and
+    can be passed anywhere a history manager is expected.
+    """
+
+    def __init__(self, history_manager: UserHistoryManager, max_pending: int = 10000,
+                 batch_size: int = 500, flush_interval: float = 1.0,
+                 submit_timeout: Optional[float] = 5.0):
+        self.history_manager = history_manager
+        self.genres = history_manager.genres
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.submit_timeout = submit_timeout
+
+        self._queue: "queue.Queue[Dict]" = queue.Queue(maxsize=max_pending)
+        # Batches requeued after transient errors; flushed before the queue
+        self._retry: List[List[Dict]] = []
+        self._pending_users = Counter()
+        self._pending_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = threading.Event()
+        self.stats = {'submitted': 0, 'flushed': 0, 'batches': 0, 'failed': 0, 'retried': 0}
+
+        self._worker = threading.Thread(
+            target=self._run, name="history-write-buffer", daemon=True
+        )
+        self._worker.start()
+        atexit.register(self.close)
+
+    # --- Writes ---
+
+    def add_to_history(self, user_id: str, movie_id: int, movie_title: str,
+                       genres: List[str], rating: float = None):
+        """Queue a movie for the user's watch history"""
+        self.submit({
+            'type': 'watch', 'user_id': user_id, 'movie_id': movie_id,
+            'title': movie_title, 'genres': genres, 'rating': rating
+        })
+
+    def add_like(self, user_id: str, movie_id: int, movie_title: str, genres: List[str]):
+        """Queue a like"""
+        self.submit({
+            'type': 'like', 'user_id': user_id, 'movie_id': movie_id,
+            'title': movie_title, 'genres': genres
+        })
+
+    def remove_like(self, user_id: str, movie_id: int):
+        """Queue removal of a like"""
+        self.submit({'type': 'unlike', 'user_id': user_id, 'movie_id': movie_id})
+
+    def submit(self, event: Dict):
+        """Queue an event, blocking while the buffer is full"""
+        if self._closed.is_set():
+            raise RuntimeError("History write buffer is closed")
+        self._validate(event)
+
+        user_id = event['user_id']
+        with self._pending_lock:
+            self._pending_users[user_id] += 1
+        try:
+            self._queue.put(event, timeout=self.submit_timeout)
+        except queue.Full:
+            self._release([event])
+            logger.warning(f"History write buffer full, rejected {event['type']} event for {user_id}")
+            raise
+
+        with self._pending_lock:
+            self.stats['submitted'] += 1
+        if self._queue.qsize() >= self.batch_size:
+            self._wake.set()
+
+    @staticmethod
+    def _validate(event: Dict):
+        # Checked here, while the caller can still be told; a bad event in a
+        # batch would otherwise cost every other event flushed with it
+        if not isinstance(event, dict) or event.get('type') not in EVENT_TYPES:
+            raise ValueError(f"History event type must be one of {EVENT_TYPES}")
+        if not isinstance(event.get('user_id'), str) or not event['user_id']:
+            raise ValueError("History event needs a non-empty string user_id")
+        movie_id = event.get('movie_id')
+        if not isinstance(movie_id, int) or isinstance(movie_id, bool):
+            raise ValueError("History event needs an integer movie_id")
+        genres = event.get('genres')
+        if genres is not None and (not isinstance(genres, list)
+                                   or not all(isinstance(g, str) for g in genres)):
+            raise ValueError("History event genres must be a list of strings")
+        rating = event.get('rating')
+        if rating is not None and (not isinstance(rating, Real) or isinstance(rating, bool)):
+            raise ValueError("History event rating must be a number")
+
+    # --- Reads (read-your-writes) ---
+
+    def get_taste_profile(self, user_id: str) -> Dict:
+        """Get the user's aggregated taste profile, including their queued events"""
+        self._flush_if_pending(user_id)
+        return self.history_manager.get_taste_profile(user_id)
+
+    def get_watch_history(self, user_id: str, limit: int = 50) -> List[Dict]:
+        """Get user's watch history, including their queued events"""
+        self._flush_if_pending(user_id)
+        return self.history_manager.get_watch_history(user_id, limit)
+
+    def get_liked_movies(self, user_id: str) -> List[Dict]:
+        """Get user's liked movies, including their queued events"""
+        self._flush_if_pending(user_id)
+        return self.history_manager.get_liked_movies(user_id)
+
+    def get_user_profile(self, user_id: str) -> Dict:
+        """Get comprehensive user profile, including their queued events"""
+        self._flush_if_pending(user_id)
+        return self.history_manager.get_user_profile(user_id)
+
+    def subscribe(self, listener):
+        """Register a change listener; it fires as queued events are committed"""
+        self.history_manager.subscribe(listener)
+
+    def pending(self, user_id: Optional[str] = None) -> int:
+        """Number of queued events, overall or for one user"""
+        with self._pending_lock:
+            if user_id is None:
+                return sum(self._pending_users.values())
+            return self._pending_users.get(user_id, 0)
+
+    # --- Flushing ---
+
+    def flush(self):
+        """Apply every queued event now, in submission order"""
+        with self._flush_lock:
+            while True:
+                if self._retry:
+                    batch = self._retry.pop(0)
+                else:
+                    batch = []
+                    while len(batch) < self.batch_size:
+                        try:
+                            batch.append(self._queue.get_nowait())
+                        except queue.Empty:
+                            break
+                if not batch:
+                    return
+
+                requeue = self._apply(batch)
+                if requeue:
+                    # Still locked: keep them (and their pending counts) for the next flush
+                    self._retry[:0] = requeue
+                    self.stats['retried'] += sum(len(b) for b in requeue)
+                    return
+
+    def _apply(self, batch: List[Dict]) -> List[List[Dict]]:
+        """Write a batch; returns the parts (in order) left unwritten because the database stayed locked"""
+        for attempt in range(TRANSIENT_RETRIES):
+            try:
+                self.history_manager.apply_events(batch)
+            except sqlite3.OperationalError as e:
+                if not self._is_transient(e):
+                    error = e
+                    break
+                logger.warning(f"History flush of {len(batch)} events hit '{e}', attempt {attempt + 1}")
+                time.sleep(0.05 * 2 ** attempt)
+                continue
+            except Exception as e:
+                error = e
+                break
+            self.stats['flushed'] += len(batch)
+            self.stats['batches'] += 1
+            self._release(batch)
+            return []
+        else:
+            return [batch]
+
+        if len(batch) == 1:
+            self.stats['failed'] += 1
+            logger.error(f"Dropping history event {batch[0]!r}: {error}")
+            self._release(batch)
+            return []
+
+        # Not transient: split so only the events that fail on their own are dropped
+        middle = len(batch) // 2
+        requeue = self._apply(batch[:middle])
+        if requeue:
+            return requeue + [batch[middle:]]
+        return self._apply(batch[middle:])
+
+    @staticmethod
+    def _is_transient(error: sqlite3.OperationalError) -> bool:
+        message = str(error).lower()
+        return 'locked' in message or 'busy' in message
+
+    def close(self):
+        """Stop the background flusher and write out everything still queued"""
+        if self._closed.is_set():
+            return
+        self._closed.set()
+        self._wake.set()
+        self._worker.join()
+        self.flush()
+        if self._retry:
+            lost = sum(len(batch) for batch in self._retry)
+            self.stats['failed'] += lost
+            logger.error(f"History write buffer closed with {lost} events still unwritten (database locked)")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _flush_if_pending(self, user_id: str):
+        if self.pending(user_id):
+            self.flush()
+
+    def _release(self, events: List[Dict]):
+        with self._pending_lock:
+            for event in events:
+                user_id = event['user_id']
+                self._pending_users[user_id] -= 1
+                if self._pending_users[user_id] <= 0:
+                    del self._pending_users[user_id]
+
+    def _run(self):
+        # Wakes on the size threshold (set by submit) or after flush_interval
+        while not self._closed.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
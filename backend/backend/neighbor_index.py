@@ -0,0 +1,73 @@
+"""
+Collaborative-filtering neighbor index
+Loads the top-K item neighbors written by scripts/train_model.py and finds
+which of a user's liked movies contribute to a recommendation
+
+Built by Ruhulalemeen Mulla
+"""
+
+import logging
+import os
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class NeighborIndex:
+    """Top-K CF neighbors per movie, keyed by TMDB ID"""
+
+    def __init__(self, path: str = "backend/model_neighbors.npz"):
+        """
+        Args:
+            path: .npz with tmdb_ids, neighbor_ids and neighbor_scores (best first)
+        """
+        self.path = path
+        with np.load(path) as data:
+            tmdb_ids = data['tmdb_ids']
+            self.neighbor_ids = data['neighbor_ids']
+            self.neighbor_scores = data['neighbor_scores']
+        self._rows = {int(tmdb_id): row for row, tmdb_id in enumerate(tmdb_ids) if tmdb_id >= 0}
+        # Artifact timestamp, so explanation caches miss after a retrain
+        self.version = os.path.getmtime(path)
+        logger.info(f"Loaded {len(self._rows)} movies x {self.neighbor_ids.shape[1]} neighbors from {path}")
+
+    @classmethod
+    def load_if_exists(cls, path: str = "backend/model_neighbors.npz") -> Optional["NeighborIndex"]:
+        """Load the index, or return None if the model has not been trained"""
+        if not os.path.exists(path):
+            logger.warning(f"No neighbor index at {path}; CF explanations are disabled")
+            return None
+        return cls(path)
+
+    def __contains__(self, movie_id: int) -> bool:
+        return movie_id in self._rows
+
+    @staticmethod
+    def liked_array(liked_ids: Iterable[int]) -> np.ndarray:
+        """Sorted array of liked IDs, built once per user and reused across movies"""
+        return np.unique(np.fromiter(liked_ids, dtype=np.int64))
+
+    def contributors(self, movie_id: int, liked: np.ndarray,
+                     top: int = 3) -> List[Tuple[int, float]]:
+        """
+        Liked movies among a movie's CF neighbors, strongest first
+
+        Args:
+            movie_id: TMDB ID of the recommended movie
+            liked: Sorted liked TMDB IDs (see liked_array)
+            top: Maximum contributors to return
+
+        Returns:
+            (liked TMDB ID, similarity) pairs; O(K log likes) per movie
+        """
+        row = self._rows.get(movie_id)
+        if row is None or not len(liked):
+            return []
+
+        ids = self.neighbor_ids[row]
+        scores = self.neighbor_scores[row]
+        positions = np.minimum(np.searchsorted(liked, ids), len(liked) - 1)
+        hits = np.flatnonzero((liked[positions] == ids) & (scores > 0))[:top]
+        return list(zip(ids[hits].tolist(), scores[hits].tolist()))
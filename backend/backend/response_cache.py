@@ -0,0 +1,117 @@
+"""
+HTTP response cache for public, user-independent endpoints
+Holds pre-serialized JSON bodies with ETags, answers If-None-Match with 304
+and refreshes stale entries in the background while still serving them
+
+Built by Ruhulalemeen Mulla
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from fastapi import Request, Response
+
+from .singleflight import AsyncSingleFlight
+
+logger = logging.getLogger(__name__)
+
+
+class ResponseCache:
+    """LRU of serialized responses keyed by route and normalized query parameters"""
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Dict]" = OrderedDict()
+        self._flights = AsyncSingleFlight()
+        self._refreshing: Dict[str, asyncio.Task] = {}
+        self.stats = {'fresh_hits': 0, 'stale_hits': 0, 'misses': 0, 'not_modified': 0}
+
+    @staticmethod
+    def make_key(route: str, params: Dict) -> str:
+        """Key on the route plus its query parameters, sorted and stringified"""
+        return route + "?" + "&".join(f"{k}={params[k]}" for k in sorted(params))
+
+    async def respond(self, request: Request, route: str, params: Dict,
+                      compute: Callable[[], Awaitable[Any]], max_age: int = 60,
+                      stale_while_revalidate: int = 300) -> Response:
+        """
+        Serve a cached response for (route, params), computing it when needed
+
+        Args:
+            request: Incoming request (for If-None-Match)
+            route: Route name used in the cache key
+            params: Normalized query parameters
+            compute: Coroutine function producing the JSON-serializable payload
+            max_age: Seconds an entry is served as fresh
+            stale_while_revalidate: Further seconds it is served while refreshing
+        """
+        key = self.make_key(route, params)
+        entry = self._entries.get(key)
+        age = time.monotonic() - entry['created'] if entry else None
+
+        if entry is not None and age <= max_age:
+            self.stats['fresh_hits'] += 1
+            self._entries.move_to_end(key)
+        elif entry is not None and age <= max_age + stale_while_revalidate:
+            self.stats['stale_hits'] += 1
+            self._entries.move_to_end(key)
+            self._refresh_in_background(key, compute)
+        else:
+            self.stats['misses'] += 1
+            entry = await self._flights.do(key, lambda: self._compute(key, compute))
+
+        headers = {
+            'ETag': entry['etag'],
+            'Cache-Control': f"public, max-age={max_age}, stale-while-revalidate={stale_while_revalidate}",
+        }
+        if self._etag_matches(request.headers.get('if-none-match'), entry['etag']):
+            self.stats['not_modified'] += 1
+            return Response(status_code=304, headers=headers)
+        return Response(content=entry['body'], media_type='application/json', headers=headers)
+
+    async def _compute(self, key: str, compute: Callable[[], Awaitable[Any]]) -> Dict:
+        payload = await compute()
+        body = json.dumps(payload, separators=(',', ':')).encode()
+        entry = {
+            'body': body,
+            'etag': '"' + hashlib.sha1(body).hexdigest() + '"',
+            'created': time.monotonic(),
+        }
+
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return entry
+
+    def _refresh_in_background(self, key: str, compute: Callable[[], Awaitable[Any]]):
+        if key in self._refreshing:
+            return
+
+        async def refresh():
+            try:
+                await self._flights.do(key, lambda: self._compute(key, compute))
+            except Exception as e:
+                logger.warning(f"Background refresh of {key} failed, keeping stale entry: {e}")
+            finally:
+                self._refreshing.pop(key, None)
+
+        self._refreshing[key] = asyncio.create_task(refresh())
+
+    @staticmethod
+    def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+        if not if_none_match:
+            return False
+        if if_none_match.strip() == '*':
+            return True
+        candidates = [tag.strip().removeprefix('W/') for tag in if_none_match.split(',')]
+        return etag in candidates
+
+    def clear(self):
+        """Drop every cached response"""
+        self._entries.clear()
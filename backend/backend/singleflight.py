@@ -0,0 +1,85 @@
+"""
+Single-flight request coalescing
+Concurrent calls for the same key share one in-flight execution and its result
+
+Built by Ruhulalemeen Mulla
+"""
+
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException = None
+
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key across threads"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self.stats = {'executions': 0, 'coalesced': 0}
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """
+        Run fn() for key, or wait for the identical call already in flight
+
+        Every waiter receives the same result object (or exception), so
+        callers must treat it as read-only.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.stats['executions'] += 1
+            else:
+                self.stats['coalesced'] += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+
+class AsyncSingleFlight:
+    """Coalesces concurrent coroutine calls with the same key on one event loop"""
+
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Task] = {}
+        self.stats = {'executions': 0, 'coalesced': 0}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Await fn() for key, or join the identical call already in flight
+
+        The upstream call runs as its own task, so one waiter being cancelled
+        (e.g. a client disconnect) does not cancel it for the others.
+        """
+        task = self._calls.get(key)
+        if task is not None:
+            self.stats['coalesced'] += 1
+        else:
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            self.stats['executions'] += 1
+            task.add_done_callback(lambda _: self._calls.pop(key, None))
+
+        return await asyncio.shield(task)
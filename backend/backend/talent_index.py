@@ -0,0 +1,244 @@
+"""
+Talent index for explanations
+Maps movies to director and top-cast IDs from cached TMDB credits, and keeps
+per-user liked-talent counts current from history writes, so talent reasons
+are set lookups with no network on the request path
+
+Built by Ruhulalemeen Mulla
+"""
+
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+from collections import Counter, OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .tmdb_cache import TMDBResponseCache
+
+logger = logging.getLogger(__name__)
+
+# Cache keys that hold a movie's credits: details with appended credits, or /credits
+CREDITS_KEY = re.compile(r"^/movie/(\d+)(?:/credits|\?append_to_response=credits)$")
+
+
+class TalentIndex:
+    """Movie -> talent IDs, plus per-user counts of liked directors and actors"""
+
+    def __init__(self, db_path: str = "talent_index.db", top_cast: int = 5,
+                 user_cache_size: int = 4096):
+        """
+        Args:
+            db_path: SQLite file holding the movie -> talent map
+            top_cast: Billed actors kept per movie
+            user_cache_size: Users whose liked-talent counts stay in memory
+        """
+        self.db_path = db_path
+        self.top_cast = top_cast
+        self.user_cache_size = user_cache_size
+
+        self._lock = threading.Lock()
+        # movie_id -> {'directors': (ids), 'cast': (ids in billing order)}
+        self._movies: Dict[int, Dict[str, Tuple[int, ...]]] = {}
+        self._names: Dict[int, str] = {}
+        # user_id -> {'directors': Counter, 'actors': Counter, 'liked': movie IDs counted}
+        self._users: "OrderedDict[str, Dict]" = OrderedDict()
+        self.stats = {'user_hits': 0, 'user_builds': 0, 'reconciled': 0, 'updates': 0}
+        # Bumped whenever movie talent changes, so dependent caches can key on it
+        self.version = 0
+
+        self._initialize_database()
+        self._load()
+
+    @classmethod
+    def open_if_exists(cls, db_path: str = "talent_index.db", **kwargs) -> Optional["TalentIndex"]:
+        """Open a built index, or return None if nothing has built one yet"""
+        if not os.path.exists(db_path):
+            logger.warning(f"No talent index at {db_path}; talent explanations are disabled")
+            return None
+        return cls(db_path, **kwargs)
+
+    def _initialize_database(self):
+        conn = sqlite3.connect(self.db_path)
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS movie_talent (
+                movie_id INTEGER PRIMARY KEY,
+                director_ids TEXT NOT NULL,
+                cast_ids TEXT NOT NULL
+            )
+        ''')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS people (
+                person_id INTEGER PRIMARY KEY,
+                name TEXT NOT NULL
+            )
+        ''')
+        conn.commit()
+        conn.close()
+
+    def _load(self):
+        conn = sqlite3.connect(self.db_path)
+        movies = {
+            movie_id: {'directors': tuple(json.loads(directors)), 'cast': tuple(json.loads(cast))}
+            for movie_id, directors, cast in conn.execute(
+                'SELECT movie_id, director_ids, cast_ids FROM movie_talent'
+            )
+        }
+        names = dict(conn.execute('SELECT person_id, name FROM people'))
+        conn.close()
+
+        with self._lock:
+            self._movies = movies
+            self._names = names
+
+    # --- Building ---
+
+    def index_credits(self, credits_by_movie: Iterable[Tuple[int, Dict]]) -> int:
+        """
+        Add or replace talent for movies from TMDB credits dicts
+
+        Args:
+            credits_by_movie: (movie_id, credits) pairs; credits has 'cast' and 'crew'
+
+        Returns:
+            Number of movies whose talent changed
+        """
+        movies = {}
+        names = {}
+        for movie_id, credits in credits_by_movie:
+            directors = [c for c in credits.get('crew', []) if c.get('job') == 'Director']
+            cast = sorted(credits.get('cast', []), key=lambda c: c.get('order', 0))[:self.top_cast]
+            for person in directors + cast:
+                names[person['id']] = person['name']
+            talent = {
+                'directors': tuple(dict.fromkeys(c['id'] for c in directors)),
+                'cast': tuple(c['id'] for c in cast),
+            }
+            if self._movies.get(movie_id) != talent:
+                movies[movie_id] = talent
+
+        if not movies:
+            return 0
+
+        conn = sqlite3.connect(self.db_path)
+        conn.executemany(
+            'INSERT OR REPLACE INTO movie_talent (movie_id, director_ids, cast_ids) VALUES (?, ?, ?)',
+            [(m, json.dumps(t['directors']), json.dumps(t['cast'])) for m, t in movies.items()]
+        )
+        conn.executemany('INSERT OR REPLACE INTO people (person_id, name) VALUES (?, ?)', names.items())
+        conn.commit()
+        conn.close()
+
+        with self._lock:
+            self._movies.update(movies)
+            self._names.update(names)
+            # Counts built before these movies were known would miss them
+            self._users.clear()
+            self.version += 1
+        return len(movies)
+
+    def build_from_cache(self, cache: TMDBResponseCache) -> int:
+        """Index every movie whose credits are in the TMDB response cache"""
+        def credits_from_cache():
+            for key, value in cache.scan("/movie/"):
+                match = CREDITS_KEY.match(key)
+                if not match:
+                    continue
+                # Details responses nest credits; /credits responses are the credits
+                credits = value if 'crew' in value else value.get('credits') or {}
+                yield int(match.group(1)), credits
+
+        indexed = self.index_credits(credits_from_cache())
+        logger.info(f"Talent index: {indexed} movies updated, {len(self._movies)} total")
+        return indexed
+
+    # --- Lookups ---
+
+    def talent_of(self, movie_id: int) -> Optional[Dict[str, Tuple[int, ...]]]:
+        """Director and top-cast IDs for a movie, or None if it is not indexed"""
+        return self._movies.get(movie_id)
+
+    def name(self, person_id: int) -> str:
+        """Display name for a person ID"""
+        return self._names.get(person_id, str(person_id))
+
+    def liked_talent(self, user_id: str, liked_ids: Iterable[int]) -> Dict:
+        """
+        Per-user counts of liked movies by director and by actor
+
+        liked_ids is the user's current likes as read from the store. Cached
+        counts are reconciled against it, so likes and unlikes written by
+        other workers show up, at a cost of only the difference.
+        on_history_events keeps this process's writes current in between.
+        Returns {'directors': Counter, 'actors': Counter, 'liked': set};
+        callers must not mutate it.
+        """
+        liked = set(liked_ids)
+        with self._lock:
+            talent = self._users.get(user_id)
+            if talent is not None:
+                self._users.move_to_end(user_id)
+                self.stats['user_hits'] += 1
+                if talent['liked'] != liked:
+                    for movie_id in talent['liked'] - liked:
+                        self._count(talent, movie_id, -1)
+                    for movie_id in liked - talent['liked']:
+                        self._count(talent, movie_id, 1)
+                    self.stats['reconciled'] += 1
+                return talent
+
+            talent = {'directors': Counter(), 'actors': Counter(), 'liked': set()}
+            for movie_id in liked:
+                self._count(talent, movie_id, 1)
+            self._users[user_id] = talent
+            while len(self._users) > self.user_cache_size:
+                self._users.popitem(last=False)
+            self.stats['user_builds'] += 1
+            return talent
+
+    def _count(self, talent: Dict, movie_id: int, direction: int):
+        # Idempotent per movie, so a listener event that races a fresh build is not counted twice
+        if (movie_id in talent['liked']) == (direction > 0):
+            return
+        if direction > 0:
+            talent['liked'].add(movie_id)
+        else:
+            talent['liked'].discard(movie_id)
+
+        movie = self._movies.get(movie_id)
+        if movie is None:
+            return
+        for role, people in (('directors', movie['directors']), ('actors', movie['cast'])):
+            counts = talent[role]
+            for person_id in people:
+                counts[person_id] += direction
+                # Drop zero counts so membership checks stay truthful
+                if counts[person_id] <= 0:
+                    del counts[person_id]
+
+    # --- Keeping users current ---
+
+    def on_history_events(self, events: List[Dict]):
+        """UserHistoryManager listener: fold committed likes and unlikes into cached users"""
+        with self._lock:
+            for event in events:
+                direction = {'like': 1, 'unlike': -1}.get(event['type'])
+                talent = self._users.get(event['user_id'])
+                # Users not in memory are rebuilt from their likes on next use
+                if direction is None or talent is None:
+                    continue
+                self._count(talent, event['movie_id'], direction)
+                self.stats['updates'] += 1
+
+    def attach(self, history_manager):
+        """Subscribe to a history manager (or write buffer) so liked talent tracks its writes"""
+        history_manager.subscribe(self.on_history_events)
+
+
+# Build the index from the shared TMDB response cache
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    index = TalentIndex(os.getenv("TALENT_INDEX_PATH", "talent_index.db"))
+    index.build_from_cache(TMDBResponseCache(os.getenv("TMDB_CACHE_PATH", "tmdb_cache.db")))
@@ -0,0 +1,195 @@
+"""
+Persistent TMDB response cache
+SQLite-backed, so every worker on a host shares it and it survives restarts
+
+Built by Ruhulalemeen Mulla
+"""
+
+import json
+import logging
+import re
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlencode
+
+logger = logging.getLogger(__name__)
+
+
+class TMDBResponseCache:
+    """TTL cache for TMDB JSON responses with negative caching and size-bounded eviction"""
+
+    # First matching pattern wins; values are seconds
+    DEFAULT_TTLS: List[Tuple[str, int]] = [
+        (r"^/trending/", 60 * 60),
+        (r"^/movie/popular", 3 * 60 * 60),
+        (r"^/search/", 60 * 60),
+        (r"^/movie/\d+/(similar|recommendations)", 24 * 60 * 60),
+        (r"^/movie/\d+", 7 * 24 * 60 * 60),
+    ]
+
+    def __init__(self, db_path: str = "tmdb_cache.db", ttls: List[Tuple[str, int]] = None,
+                 default_ttl: int = 60 * 60, negative_ttl: int = 60,
+                 max_entries: int = 50000):
+        """
+        Args:
+            db_path: SQLite file shared by all workers
+            ttls: (endpoint regex, seconds) pairs, checked in order
+            default_ttl: TTL for endpoints no pattern matches
+            negative_ttl: TTL for failed lookups (cached as None)
+            max_entries: Entries kept before the soonest-expiring are evicted
+        """
+        self.db_path = db_path
+        self.ttls = [(re.compile(p), ttl) for p, ttl in (ttls or self.DEFAULT_TTLS)]
+        self.default_ttl = default_ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+
+        self._lock = threading.Lock()
+        self._writes_since_evict = 0
+        self._counters = {'hits': 0, 'negative_hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0}
+        self._initialize_database()
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path, timeout=5.0)
+
+    def _initialize_database(self):
+        """Create the cache table; WAL lets readers in other workers run during writes"""
+        conn = self._connect()
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS tmdb_cache (
+                key TEXT PRIMARY KEY,
+                value TEXT,
+                expires_at REAL NOT NULL
+            )
+        ''')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_tmdb_cache_expires ON tmdb_cache (expires_at)')
+        conn.commit()
+        conn.close()
+
+    @staticmethod
+    def make_key(endpoint: str, params: Dict = None) -> str:
+        """Build a cache key from an endpoint and its params (API key excluded)"""
+        params = {k: v for k, v in (params or {}).items() if k != 'api_key'}
+        if not params:
+            return endpoint
+        return f"{endpoint}?{urlencode(sorted(params.items()))}"
+
+    def ttl_for(self, endpoint: str) -> int:
+        """TTL in seconds for a successful response from this endpoint"""
+        for pattern, ttl in self.ttls:
+            if pattern.search(endpoint):
+                return ttl
+        return self.default_ttl
+
+    def get(self, key: str) -> Tuple[bool, Optional[Dict]]:
+        """
+        Look up a key
+
+        Returns:
+            (hit, value); value is None on a miss or a cached failure
+        """
+        conn = self._connect()
+        row = conn.execute(
+            'SELECT value FROM tmdb_cache WHERE key = ? AND expires_at > ?',
+            (key, time.time())
+        ).fetchone()
+        conn.close()
+
+        with self._lock:
+            if row is None:
+                self._counters['misses'] += 1
+                return False, None
+            if row[0] is None:
+                self._counters['negative_hits'] += 1
+                return True, None
+            self._counters['hits'] += 1
+        return True, json.loads(row[0])
+
+    def set(self, key: str, endpoint: str, value: Optional[Dict]):
+        """Store a response, or None for a failed lookup (short negative TTL)"""
+        ttl = self.ttl_for(endpoint) if value is not None else self.negative_ttl
+        payload = json.dumps(value) if value is not None else None
+
+        conn = self._connect()
+        conn.execute(
+            'INSERT OR REPLACE INTO tmdb_cache (key, value, expires_at) VALUES (?, ?, ?)',
+            (key, payload, time.time() + ttl)
+        )
+        conn.commit()
+        conn.close()
+
+        with self._lock:
+            self._counters['stores'] += 1
+            self._writes_since_evict += 1
+            # Counting rows is not free, so only check the bound every so often
+            should_evict = self._writes_since_evict >= max(self.max_entries // 100, 1)
+            if should_evict:
+                self._writes_since_evict = 0
+        if should_evict:
+            self.evict()
+
+    def get_or_fetch(self, endpoint: str, params: Dict,
+                     fetch: Callable[[], Optional[Dict]]) -> Optional[Dict]:
+        """Return the cached response, calling fetch() and caching its result on a miss"""
+        key = self.make_key(endpoint, params)
+        hit, value = self.get(key)
+        if hit:
+            return value
+
+        value = fetch()
+        self.set(key, endpoint, value)
+        return value
+
+    def scan(self, prefix: str) -> Iterator[Tuple[str, Dict]]:
+        """Yield (key, value) for every unexpired, successful entry whose key starts with prefix"""
+        conn = self._connect()
+        try:
+            # Range scan on the primary key; '\uffff' sorts after any key character
+            cursor = conn.execute(
+                'SELECT key, value FROM tmdb_cache WHERE key >= ? AND key < ? '
+                'AND expires_at > ? AND value IS NOT NULL',
+                (prefix, prefix + '\uffff', time.time())
+            )
+            for key, value in cursor:
+                yield key, json.loads(value)
+        finally:
+            conn.close()
+
+    def evict(self):
+        """Drop expired entries, then the soonest-expiring ones above max_entries"""
+        conn = self._connect()
+        cursor = conn.cursor()
+        cursor.execute('DELETE FROM tmdb_cache WHERE expires_at <= ?', (time.time(),))
+        removed = cursor.rowcount
+        cursor.execute('SELECT COUNT(*) FROM tmdb_cache')
+        excess = cursor.fetchone()[0] - self.max_entries
+        if excess > 0:
+            cursor.execute('''
+                DELETE FROM tmdb_cache WHERE key IN (
+                    SELECT key FROM tmdb_cache ORDER BY expires_at LIMIT ?
+                )
+            ''', (excess,))
+            removed += cursor.rowcount
+        conn.commit()
+        conn.close()
+
+        with self._lock:
+            self._counters['evictions'] += removed
+
+    def stats(self) -> Dict:
+        """Hit/miss counters for this process plus the shared entry count"""
+        conn = self._connect()
+        entries = conn.execute('SELECT COUNT(*) FROM tmdb_cache').fetchone()[0]
+        conn.close()
+
+        with self._lock:
+            counters = dict(self._counters)
+        lookups = counters['hits'] + counters['negative_hits'] + counters['misses']
+        counters['entries'] = entries
+        counters['hit_rate'] = round(
+            (counters['hits'] + counters['negative_hits']) / lookups, 4
+        ) if lookups else 0.0
+        return counters
@@ -0,0 +1,118 @@
+"""
+Async TMDB client
+Shares one keep-alive connection pool across requests, with per-request
+timeouts and a cap on concurrent upstream calls
+
+Built by Ruhulalemeen Mulla
+"""
+
+import asyncio
+import logging
+import os
+from typing import Dict, Optional
+
+import httpx
+
+from .singleflight import AsyncSingleFlight
+from .tmdb_scheduler import INTERACTIVE, TMDBScheduler, get_scheduler
+
+logger = logging.getLogger(__name__)
+
+
+class TMDBError(Exception):
+    """Raised when TMDB cannot be reached or answers with a non-200 status"""
+
+    def __init__(self, status_code: int, message: str = "TMDB API error"):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class TMDBClient:
+    """Async TMDB client with a pooled httpx connection"""
+
+    DEFAULT_BASE_URL = "https://api.themoviedb.org/3"
+
+    def __init__(self, api_key: str = None, base_url: str = None,
+                 timeout: float = 10.0, max_connections: int = 20,
+                 max_concurrency: int = 10,
+                 transport: Optional[httpx.AsyncBaseTransport] = None,
+                 scheduler: Optional[TMDBScheduler] = None):
+        """
+        Args:
+            api_key: TMDB API key (defaults to TMDB_API_KEY)
+            base_url: API root; point TMDB_BASE_URL at a local stand-in for tests
+            timeout: Per-request timeout in seconds
+            max_connections: Size of the keep-alive connection pool
+            max_concurrency: Maximum in-flight upstream requests
+            transport: Optional httpx transport, e.g. httpx.MockTransport
+            scheduler: Rate-limit scheduler (defaults to the process-wide one)
+        """
+        self.api_key = api_key or os.getenv("TMDB_API_KEY")
+        self.base_url = (base_url or os.getenv("TMDB_BASE_URL") or self.DEFAULT_BASE_URL).rstrip("/")
+        self.timeout = httpx.Timeout(timeout, connect=min(timeout, 5.0))
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections
+        )
+        self.transport = transport
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._client: Optional[httpx.AsyncClient] = None
+        # Identical concurrent requests share one upstream fetch
+        self._flights = AsyncSingleFlight()
+        self.scheduler = scheduler or get_scheduler()
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        # Created lazily so the pool belongs to the running event loop
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=self.timeout,
+                limits=self.limits,
+                transport=self.transport
+            )
+        return self._client
+
+    async def get(self, endpoint: str, params: Dict = None,
+                  priority: int = INTERACTIVE) -> Dict:
+        """
+        Fetch a TMDB endpoint and return the decoded JSON body
+
+        Concurrent calls with the same endpoint and params are coalesced and
+        receive the same dict, which callers must not mutate.
+        """
+        params = dict(params or {})
+        key = (endpoint, tuple(sorted((k, str(v)) for k, v in params.items())))
+        return await self._flights.do(key, lambda: self._fetch(endpoint, params, priority))
+
+    async def _fetch(self, endpoint: str, params: Dict, priority: int) -> Dict:
+        params["api_key"] = self.api_key
+
+        async def send():
+            async with self._semaphore:
+                return await self.client.get(endpoint, params=params)
+
+        try:
+            response = await self.scheduler.execute_async(send, priority)
+        except httpx.TimeoutException as e:
+            logger.error(f"Timeout fetching {endpoint}: {e}")
+            raise TMDBError(504, "TMDB API timeout") from e
+        except httpx.HTTPError as e:
+            logger.error(f"Error fetching {endpoint}: {e}")
+            raise TMDBError(502, "TMDB API unreachable") from e
+
+        if response.status_code != 200:
+            raise TMDBError(response.status_code)
+        return response.json()
+
+    async def close(self):
+        """Close pooled connections"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
@@ -5,12 +5,19 @@ Fetches real movie metadata and fuses with recommendation algorithm
 Built by Ruhulalemeen Mulla
 """
 
+import heapq
 import requests
+from requests.adapters import HTTPAdapter
 import os
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Optional
-from functools import lru_cache
 import logging
 
+from .catalog import LocalCatalog
+from .singleflight import SingleFlight
+from .tmdb_cache import TMDBResponseCache
+from .tmdb_scheduler import INTERACTIVE, TMDBScheduler, get_scheduler
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -18,47 +25,77 @@ logger = logging.getLogger(__name__)
 class TMDBFusion:
     """Integrates TMDB API with recommendation system"""
     
-    BASE_URL = "https://api.themoviedb.org/3"
+    DEFAULT_BASE_URL = "https://api.themoviedb.org/3"
     
-    def __init__(self, api_key: str = None):
+    def __init__(self, api_key: str = None, max_workers: int = 8, timeout: float = 10.0,
+                 cache: Optional[TMDBResponseCache] = None,
+                 scheduler: Optional[TMDBScheduler] = None, base_url: str = None):
         self.api_key = api_key or os.getenv("TMDB_API_KEY")
         if not self.api_key:
             raise ValueError("TMDB API key required")
+        # Same override as TMDBClient, so a local stand-in can serve every TMDB path
+        self.base_url = (base_url or os.getenv("TMDB_BASE_URL") or self.DEFAULT_BASE_URL).rstrip("/")
+        
+        self.timeout = timeout
+        # Keep-alive pool sized to the enrichment workers so they don't queue on sockets
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_workers)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tmdb-enrich")
+        
+        # Shared on-disk cache so all workers reuse warm metadata across restarts
+        self.cache = cache or TMDBResponseCache(os.getenv("TMDB_CACHE_PATH", "tmdb_cache.db"))
+        # Concurrent misses for the same key share one upstream request
+        self._flights = SingleFlight()
+        # Process-wide rate limiting shared with every other TMDB caller
+        self.scheduler = scheduler or get_scheduler()
+    
+    def fetch(self, endpoint: str, params: Dict = None,
+              priority: int = INTERACTIVE) -> Optional[Dict]:
+        """GET a TMDB endpoint through the response cache; None on failure"""
+        params = params or {}
+        return self._flights.do(
+            self.cache.make_key(endpoint, params),
+            lambda: self.cache.get_or_fetch(
+                endpoint, params, lambda: self._request(endpoint, params, priority)
+            )
+        )
     
-    @lru_cache(maxsize=1000)
-    def get_movie_details(self, movie_id: int) -> Optional[Dict]:
-        """Fetch comprehensive movie details from TMDB"""
+    def _request(self, endpoint: str, params: Dict, priority: int) -> Optional[Dict]:
         try:
-            response = requests.get(
-                f"{self.BASE_URL}/movie/{movie_id}",
-                params={"api_key": self.api_key}
+            response = self.scheduler.execute(
+                lambda: self.session.get(
+                    f"{self.base_url}{endpoint}",
+                    params={"api_key": self.api_key, **params},
+                    timeout=self.timeout
+                ),
+                priority
             )
             response.raise_for_status()
             return response.json()
         except Exception as e:
-            logger.error(f"Error fetching movie {movie_id}: {e}")
+            logger.error(f"Error fetching {endpoint}: {e}")
             return None
     
-    @lru_cache(maxsize=500)
+    def get_movie_details(self, movie_id: int, priority: int = INTERACTIVE) -> Optional[Dict]:
+        """Fetch comprehensive movie details, with credits appended, from TMDB"""
+        return self.fetch(f"/movie/{movie_id}", {"append_to_response": "credits"}, priority)
+    
     def get_movie_credits(self, movie_id: int) -> Optional[Dict]:
-        """Fetch cast and crew information"""
-        try:
-            response = requests.get(
-                f"{self.BASE_URL}/movie/{movie_id}/credits",
-                params={"api_key": self.api_key}
-            )
-            response.raise_for_status()
-            return response.json()
-        except Exception as e:
-            logger.error(f"Error fetching credits for {movie_id}: {e}")
+        """Fetch cast and crew information (served from the details response)"""
+        details = self.get_movie_details(movie_id)
+        if not details:
             return None
+        return details.get('credits')
     
-    def enrich_movie_data(self, movie_basic: Dict) -> Dict:
+    def enrich_movie_data(self, movie_basic: Dict, priority: int = INTERACTIVE) -> Dict:
         """
         Enrich basic movie data with TMDB metadata
         
         Args:
             movie_basic: Basic movie dict with at least {id, title}
+            priority: Scheduler priority (BACKGROUND for prefetch jobs)
         
         Returns:
             Enhanced movie dict with TMDB data
@@ -67,13 +104,12 @@ class TMDBFusion:
         if not movie_id:
             return movie_basic
         
-        # Get detailed info
-        details = self.get_movie_details(movie_id)
+        # Get detailed info; credits come back in the same response
+        details = self.get_movie_details(movie_id, priority)
         if not details:
             return movie_basic
         
-        # Get credits
-        credits = self.get_movie_credits(movie_id)
+        credits = details.get('credits')
         
         # Build enriched data
         enriched = {
@@ -108,31 +144,40 @@ class TMDBFusion:
         
         return enriched
     
-    def search_movies(self, query: str, page: int = 1) -> List[Dict]:
-        """Search movies by query"""
-        try:
-            response = requests.get(
-                f"{self.BASE_URL}/search/movie",
-                params={
-                    "api_key": self.api_key,
-                    "query": query,
-                    "page": page
-                }
-            )
-            response.raise_for_status()
-            results = response.json().get('results', [])
-            return [self.enrich_movie_data(m) for m in results]
-        except Exception as e:
-            logger.error(f"Error searching movies: {e}")
+    def enrich_movies(self, movies: List[Dict], priority: int = INTERACTIVE) -> List[Dict]:
+        """Enrich a page of movies concurrently, preserving their order"""
+        return list(self._executor.map(lambda m: self.enrich_movie_data(m, priority), movies))
+    
+    def genre_names(self) -> Dict[int, str]:
+        """TMDB genre ID -> name, from the cached genre list"""
+        data = self.fetch("/genre/movie/list")
+        return {g['id']: g['name'] for g in (data or {}).get('genres', [])}
+    
+    def search_movies(self, query: str, page: int = 1, enrich: bool = True) -> List[Dict]:
+        """Search movies by query; enrich=False returns TMDB's basic result fields only"""
+        data = self.fetch("/search/movie", {"query": query, "page": page})
+        if not data:
             return []
+        results = data.get('results', [])
+        return self.enrich_movies(results) if enrich else results
 
 
 class HybridRecommender:
     """Hybrid recommender combining ML model with TMDB data"""
     
-    def __init__(self, tmdb_fusion: TMDBFusion, ml_recommender):
+    def __init__(self, tmdb_fusion: Optional[TMDBFusion], ml_recommender,
+                 catalog: Optional[LocalCatalog] = None, candidate_pool: int = 200):
+        """
+        Args:
+            tmdb_fusion: TMDB client; only needed for movies missing from the catalog
+            ml_recommender: Ranker exposing get_recommendations(user_id, candidates, top_n)
+            catalog: Synced local catalog; when set, candidates and metadata come from it
+            candidate_pool: Catalog candidates handed to the ranker per request
+        """
         self.tmdb = tmdb_fusion
         self.ml_recommender = ml_recommender
+        self.catalog = catalog
+        self.candidate_pool = candidate_pool
     
     def get_smart_recommendations(self, user_id: str, query: Optional[str] = None,
                                  top_n: int = 10) -> List[Dict]:
@@ -147,23 +192,21 @@ class HybridRecommender:
         Returns:
             Enriched recommendations with TMDB metadata
         """
-        # Get candidate movies (from search or trending)
-        if query:
-            candidates = self.tmdb.search_movies(query)
-        else:
-            candidates = self._get_trending_movies()
+        # Stage 1: cheap ranking on basic fields, keeping a shortlist twice the size
+        candidates = self._get_candidates(query)
+        ranked = self.ml_recommender.get_recommendations(user_id, candidates, top_n=top_n * 2)
+        seen = set()
+        shortlist = []
+        for rec in ranked:
+            if rec.get('id') not in seen:
+                seen.add(rec.get('id'))
+                shortlist.append(rec)
         
-        # Get ML-based recommendations
-        ml_recommendations = self.ml_recommender.get_recommendations(
-            user_id, candidates, top_n=top_n * 2  # Get more for filtering
-        )
+        # Stage 2: enrich only the shortlist, each movie once
+        enriched_recs = self._enrich_all(shortlist)
         
-        # Enrich with TMDB data
-        enriched_recs = []
-        for rec in ml_recommendations[:top_n]:
-            enriched = self.tmdb.enrich_movie_data(rec)
-            
-            # Calculate enhanced score using TMDB data
+        # Stage 3: blend in the TMDB score across the whole shortlist, then take the top N
+        for enriched, rec in zip(enriched_recs, shortlist):
             tmdb_score = self._calculate_tmdb_score(enriched)
             ml_score = rec.get('similarity_score', 0)
             
@@ -173,26 +216,51 @@ class HybridRecommender:
             enriched['final_score'] = round(final_score, 4)
             enriched['ml_score'] = ml_score
             enriched['tmdb_score'] = tmdb_score
-            
-            enriched_recs.append(enriched)
         
-        # Re-sort by final score
-        enriched_recs.sort(key=lambda x: x['final_score'], reverse=True)
+        return heapq.nlargest(top_n, enriched_recs, key=lambda x: x['final_score'])
+    
+    def _get_candidates(self, query: Optional[str] = None) -> List[Dict]:
+        """Candidate movies for ranking, from the local catalog when one is configured"""
+        if self.catalog is not None:
+            self.catalog.maybe_reload()
+            if query:
+                return self.catalog.search(query, limit=self.candidate_pool)
+            return self.catalog.popular(limit=self.candidate_pool)
         
-        return enriched_recs
+        movies = self.tmdb.search_movies(query, enrich=False) if query else self._get_trending_movies()
+        # List results carry genre_ids only; name them so the ranker can score genres
+        names = self.tmdb.genre_names()
+        return [
+            m if 'genres' in m else {**m, 'genres': [names[g] for g in m.get('genre_ids', []) if g in names]}
+            for m in movies
+        ]
+    
+    def _enrich_all(self, movies: List[Dict]) -> List[Dict]:
+        """Attach metadata, reading the catalog first and asking TMDB only for misses"""
+        enriched: List[Optional[Dict]] = [None] * len(movies)
+        misses = []
+        for i, movie in enumerate(movies):
+            local = self.catalog.get(movie.get('id')) if self.catalog is not None else None
+            if local is not None:
+                enriched[i] = {**movie, 'genres': local['genres'], 'tmdb_data': local['tmdb_data']}
+            else:
+                misses.append(i)
+        
+        if misses and self.tmdb is not None:
+            # One TMDB enrichment per distinct ID, shared by any repeats
+            first = {}
+            for i in misses:
+                first.setdefault(movies[i].get('id'), i)
+            fetched = dict(zip(first, self.tmdb.enrich_movies([movies[i] for i in first.values()])))
+            for i in misses:
+                enriched[i] = {**movies[i], **fetched[movies[i].get('id')]}
+        # Shallow copies, so callers can add scores without touching shared catalog entries
+        return [dict(e if e is not None else m) for e, m in zip(enriched, movies)]
     
     def _get_trending_movies(self, page: int = 1) -> List[Dict]:
         """Fetch trending movies from TMDB"""
-        try:
-            response = requests.get(
-                f"{self.tmdb.BASE_URL}/trending/movie/week",
-                params={"api_key": self.tmdb.api_key, "page": page}
-            )
-            response.raise_for_status()
-            return response.json().get('results', [])
-        except Exception as e:
-            logger.error(f"Error fetching trending: {e}")
-            return []
+        data = self.tmdb.fetch("/trending/movie/week", {"page": page})
+        return data.get('results', []) if data else []
     
     def _calculate_tmdb_score(self, movie: Dict) -> float:
         """Calculate quality score from TMDB metadata"""
@@ -220,19 +288,14 @@ class HybridRecommender:
     
     def get_similar_movies(self, movie_id: int, top_n: int = 10) -> List[Dict]:
         """Get similar movies using TMDB's similarity API"""
-        try:
-            response = requests.get(
-                f"{self.tmdb.BASE_URL}/movie/{movie_id}/similar",
-                params={"api_key": self.tmdb.api_key}
-            )
-            response.raise_for_status()
-            similar = response.json().get('results', [])
-            
-            # Enrich and return
-            return [self.tmdb.enrich_movie_data(m) for m in similar[:top_n]]
-        except Exception as e:
-            logger.error(f"Error fetching similar movies: {e}")
+        if self.tmdb is None:
+            # Catalog-only rankers have no similarity source to ask
             return []
+        data = self.tmdb.fetch(f"/movie/{movie_id}/similar")
+        similar = data.get('results', []) if data else []
+        
+        # Enrich and return
+        return self._enrich_all(similar[:top_n])
 
 
 # Example usage
@@ -0,0 +1,216 @@
+"""
+Rate-limit-aware scheduler for outbound TMDB traffic
+One token bucket per process, with interactive requests served before
+background enrichment, and jittered retries that honor Retry-After
+
+Built by Ruhulalemeen Mulla
+"""
+
+import asyncio
+import logging
+import os
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Priorities: lower value is served first
+INTERACTIVE = 0
+BACKGROUND = 1
+
+RETRY_STATUSES = {429, 502, 503, 504}
+
+
+class TMDBScheduler:
+    """Token-bucket scheduler shared by every TMDB caller in the process"""
+
+    def __init__(self, rate: float = 40.0, burst: int = 40, max_retries: int = 3,
+                 base_delay: float = 0.5, max_delay: float = 10.0):
+        """
+        Args:
+            rate: Sustained requests per second (per worker process)
+            burst: Bucket capacity
+            max_retries: Retries after a 429/5xx before the response is returned
+            base_delay: First backoff step when no Retry-After is given
+            max_delay: Cap on a single backoff
+        """
+        self.rate = rate
+        self.burst = burst
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+        self._lock = threading.Lock()
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._waiting = {INTERACTIVE: 0, BACKGROUND: 0}
+        self._stats = {
+            'requests': 0, 'retries': 0, 'rate_limited': 0,
+            'wait_time': {INTERACTIVE: 0.0, BACKGROUND: 0.0},
+            'max_wait': {INTERACTIVE: 0.0, BACKGROUND: 0.0},
+            'acquired': {INTERACTIVE: 0, BACKGROUND: 0},
+        }
+
+    # --- Token acquisition ---
+
+    def _try_acquire(self, priority: int) -> float:
+        """Take a token if this priority may proceed; otherwise return seconds to wait"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+
+            if now < self._paused_until:
+                return self._paused_until - now
+            # Leave tokens for any higher-priority waiter
+            if any(self._waiting[p] for p in self._waiting if p < priority):
+                return max((1 - self._tokens) / self.rate, 0.0) + 0.005
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
+
+    def _enter(self, priority: int) -> float:
+        with self._lock:
+            self._waiting[priority] += 1
+        return time.monotonic()
+
+    def _leave(self, priority: int, started: float):
+        waited = time.monotonic() - started
+        with self._lock:
+            self._waiting[priority] -= 1
+            self._stats['acquired'][priority] += 1
+            self._stats['wait_time'][priority] += waited
+            self._stats['max_wait'][priority] = max(self._stats['max_wait'][priority], waited)
+
+    def acquire(self, priority: int = INTERACTIVE):
+        """Block the calling thread until a request slot is available"""
+        started = self._enter(priority)
+        try:
+            while True:
+                wait = self._try_acquire(priority)
+                if not wait:
+                    return
+                time.sleep(wait)
+        finally:
+            self._leave(priority, started)
+
+    async def acquire_async(self, priority: int = INTERACTIVE):
+        """Wait without blocking the event loop until a request slot is available"""
+        started = self._enter(priority)
+        try:
+            while True:
+                wait = self._try_acquire(priority)
+                if not wait:
+                    return
+                await asyncio.sleep(wait)
+        finally:
+            self._leave(priority, started)
+
+    # --- Sending with retries ---
+
+    def execute(self, send: Callable[[], Any], priority: int = INTERACTIVE) -> Any:
+        """
+        Send a request through the bucket, retrying 429/5xx responses
+
+        Args:
+            send: Zero-argument callable returning a requests/httpx response
+            priority: INTERACTIVE or BACKGROUND
+
+        Returns:
+            The first non-retryable response, or the last one once retries run out
+        """
+        for attempt in range(self.max_retries + 1):
+            self.acquire(priority)
+            response = send()
+            delay = self._after_response(response, attempt)
+            if delay is None:
+                return response
+            time.sleep(delay)
+        return response
+
+    async def execute_async(self, send: Callable[[], Awaitable[Any]],
+                            priority: int = INTERACTIVE) -> Any:
+        """Async counterpart of execute for coroutine-returning senders"""
+        for attempt in range(self.max_retries + 1):
+            await self.acquire_async(priority)
+            response = await send()
+            delay = self._after_response(response, attempt)
+            if delay is None:
+                return response
+            await asyncio.sleep(delay)
+        return response
+
+    def _after_response(self, response: Any, attempt: int) -> Optional[float]:
+        """Record a response and return the backoff before retrying, or None to stop"""
+        with self._lock:
+            self._stats['requests'] += 1
+            if response.status_code == 429:
+                self._stats['rate_limited'] += 1
+
+        if response.status_code not in RETRY_STATUSES or attempt >= self.max_retries:
+            return None
+
+        retry_after = self._parse_retry_after(response.headers.get('Retry-After'))
+        if retry_after is not None:
+            delay = min(retry_after, self.max_delay) + random.uniform(0, self.base_delay)
+        else:
+            # Full jitter exponential backoff
+            delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+        with self._lock:
+            self._stats['retries'] += 1
+            if response.status_code == 429:
+                # TMDB is telling the whole process to slow down, not just this caller
+                self._paused_until = max(self._paused_until, time.monotonic() + delay)
+
+        logger.warning(f"TMDB returned {response.status_code}, retrying in {delay:.2f}s")
+        return delay
+
+    @staticmethod
+    def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+        if not value:
+            return None
+        try:
+            return max(float(value), 0.0)
+        except ValueError:
+            pass
+        try:
+            return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+        except (TypeError, ValueError):
+            return None
+
+    # --- Introspection ---
+
+    def stats(self) -> Dict:
+        """Queue depth per priority plus request, retry and wait-time counters"""
+        names = {INTERACTIVE: 'interactive', BACKGROUND: 'background'}
+        with self._lock:
+            return {
+                'queue_depth': {names[p]: n for p, n in self._waiting.items()},
+                'requests': self._stats['requests'],
+                'retries': self._stats['retries'],
+                'rate_limited': self._stats['rate_limited'],
+                'avg_wait': {
+                    names[p]: round(self._stats['wait_time'][p] / self._stats['acquired'][p], 4)
+                    if self._stats['acquired'][p] else 0.0
+                    for p in names
+                },
+                'max_wait': {names[p]: round(w, 4) for p, w in self._stats['max_wait'].items()},
+            }
+
+
+_default_scheduler: Optional[TMDBScheduler] = None
+
+
+def get_scheduler() -> TMDBScheduler:
+    """Get the process-wide scheduler (rate from TMDB_RATE_LIMIT, per worker)"""
+    global _default_scheduler
+    if _default_scheduler is None:
+        rate = float(os.getenv("TMDB_RATE_LIMIT", "40"))
+        _default_scheduler = TMDBScheduler(rate=rate, burst=max(int(rate), 1))
+    return _default_scheduler
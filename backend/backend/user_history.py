@@ -5,22 +5,173 @@ Implements user profile tracking and cosine similarity-based recommendations
 Built by Ruhulalemeen Mulla
 """
 
+import asyncio
+import functools
 import json
+import time
 import numpy as np
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Iterable, Callable, Any, Tuple
 from sklearn.metrics.pairwise import cosine_similarity
 from sklearn.feature_extraction.text import TfidfVectorizer
+import logging
 import sqlite3
+import threading
 import os
 
+logger = logging.getLogger(__name__)
+
+# Genres are stored as one bit each in an INTEGER column. SQLite integers are
+# signed 64-bit, so bit 63 is left unused to keep every mask non-negative.
+MAX_GENRES = 63
+
+# Seeded in this order so the common TMDB and MovieLens genres get stable bits
+DEFAULT_GENRES = [
+    "Action", "Adventure", "Animation", "Comedy", "Crime", "Documentary",
+    "Drama", "Family", "Fantasy", "History", "Horror", "Music", "Mystery",
+    "Romance", "Science Fiction", "TV Movie", "Thriller", "War", "Western",
+    "Sci-Fi", "Children", "Film-Noir", "IMAX", "Musical",
+]
+
+_BIT_POSITIONS = np.arange(MAX_GENRES, dtype=np.int64)
+
+
+def masks_to_matrix(masks: Iterable[int]) -> np.ndarray:
+    """Expand genre bitmasks into a (n_masks, MAX_GENRES) boolean matrix"""
+    masks = np.fromiter(masks, dtype=np.int64)
+    return ((masks[:, None] >> _BIT_POSITIONS) & 1).astype(bool)
+
+
+def genre_weight_vector(liked_masks: Iterable[int],
+                        watched_masks: Iterable[int]) -> np.ndarray:
+    """Per-bit genre weights: 2 per liked movie, 1 per watched movie"""
+    return (2 * masks_to_matrix(liked_masks).sum(axis=0)
+            + masks_to_matrix(watched_masks).sum(axis=0))
+
+
+def bits_to_mask(bits: Iterable[int]) -> int:
+    """Combine bit positions into a single genre mask"""
+    mask = 0
+    for bit in bits:
+        mask |= 1 << int(bit)
+    return mask
+
+
+class GenreVocabulary:
+    """Maps genre names to bit positions persisted alongside the history tables"""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._bits: Dict[str, int] = {}
+        self._names: Dict[int, str] = {}
+        self._decoded: Dict[int, List[str]] = {}
+        self._load()
+
+    def _load(self):
+        """Create the vocabulary table, seed it and load it into memory"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS genre_vocabulary (
+                bit INTEGER PRIMARY KEY,
+                name TEXT NOT NULL UNIQUE
+            )
+        ''')
+        cursor.execute('SELECT COUNT(*) FROM genre_vocabulary')
+        if cursor.fetchone()[0] == 0:
+            cursor.executemany(
+                'INSERT OR IGNORE INTO genre_vocabulary (bit, name) VALUES (?, ?)',
+                list(enumerate(DEFAULT_GENRES))
+            )
+        conn.commit()
+        cursor.execute('SELECT bit, name FROM genre_vocabulary')
+        rows = cursor.fetchall()
+        conn.close()
+
+        for bit, name in rows:
+            self._bits[name] = bit
+            self._names[bit] = name
+
+    def bit(self, name: str) -> Optional[int]:
+        """Get the bit for a genre, registering new genres on first sight"""
+        bit = self._bits.get(name)
+        if bit is not None:
+            return bit
+
+        with self._lock:
+            if name in self._bits:
+                return self._bits[name]
+            if len(self._bits) >= MAX_GENRES:
+                logger.warning(f"Genre vocabulary full, ignoring genre '{name}'")
+                return None
+
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            # Allocate the next free bit atomically so concurrent processes agree
+            cursor.execute('''
+                INSERT OR IGNORE INTO genre_vocabulary (bit, name)
+                SELECT COALESCE(MAX(bit) + 1, 0), ? FROM genre_vocabulary
+            ''', (name,))
+            conn.commit()
+            cursor.execute('SELECT bit FROM genre_vocabulary WHERE name = ?', (name,))
+            bit = cursor.fetchone()[0]
+            conn.close()
+
+            if bit >= MAX_GENRES:
+                logger.warning(f"Genre vocabulary full, ignoring genre '{name}'")
+                return None
+
+            self._bits[name] = bit
+            self._names[bit] = name
+            self._decoded.clear()
+            return bit
+
+    def encode(self, genres: Iterable[str]) -> int:
+        """Encode a list of genre names as an integer bitmask"""
+        mask = 0
+        for name in genres:
+            bit = self.bit(name)
+            if bit is not None:
+                mask |= 1 << bit
+        return mask
+
+    def decode(self, mask: int) -> List[str]:
+        """Decode a bitmask back into genre names, in bit order"""
+        names = self._decoded.get(mask)
+        if names is None:
+            names = [self._names[b] for b in range(MAX_GENRES)
+                     if mask >> b & 1 and b in self._names]
+            self._decoded[mask] = names
+        return names
+
+    def mask_of(self, movie: Dict) -> int:
+        """Get a movie dict's genre mask, encoding its genre names if needed"""
+        mask = movie.get('genre_mask')
+        if mask is None:
+            mask = self.encode(movie.get('genres') or [])
+        return mask
+
 
 class UserHistoryManager:
     """Manages user watch history and liked movies"""
     
-    def __init__(self, db_path: str = "user_history.db"):
+    def __init__(self, db_path: str = "user_history.db",
+                 profile_cache_size: int = 1024, profile_cache_ttl: float = 5.0):
         self.db_path = db_path
         self._initialize_database()
+        self.genres = GenreVocabulary(db_path)
+        self._migrate_genre_masks()
+        
+        # Taste profiles written by this process are cached write-through; the
+        # TTL bounds how stale a profile updated by another worker can get
+        self.profile_cache_size = profile_cache_size
+        self.profile_cache_ttl = profile_cache_ttl
+        self._profile_cache: "OrderedDict[str, Tuple[float, Dict]]" = OrderedDict()
+        self._profile_lock = threading.Lock()
+        self._listeners: List[Callable[[List[Dict]], None]] = []
     
     def _initialize_database(self):
         """Create database tables if they don't exist"""
@@ -35,6 +186,7 @@ class UserHistoryManager:
                 movie_id INTEGER NOT NULL,
                 movie_title TEXT,
                 genres TEXT,
+                genre_mask INTEGER,
                 rating REAL,
                 watched_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             )
@@ -48,57 +200,335 @@ class UserHistoryManager:
                 movie_id INTEGER NOT NULL,
                 movie_title TEXT,
                 genres TEXT,
+                genre_mask INTEGER,
                 liked_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                 UNIQUE(user_id, movie_id)
             )
         ''')
         
+        # Running taste profile aggregate, updated on every history/like write
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS user_profiles (
+                user_id TEXT PRIMARY KEY,
+                genre_weights TEXT NOT NULL,
+                liked_ids TEXT NOT NULL,
+                watched_ids TEXT NOT NULL,
+                liked_count INTEGER NOT NULL,
+                watched_count INTEGER NOT NULL,
+                version INTEGER NOT NULL,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        
+        # Databases created before genre masks existed lack the column
+        for table in ('watch_history', 'user_likes'):
+            cursor.execute(f'PRAGMA table_info({table})')
+            columns = {row[1] for row in cursor.fetchall()}
+            if 'genre_mask' not in columns:
+                cursor.execute(f'ALTER TABLE {table} ADD COLUMN genre_mask INTEGER')
+        
         conn.commit()
         conn.close()
     
-    def add_to_history(self, user_id: str, movie_id: int, movie_title: str, 
-                       genres: List[str], rating: float = None):
-        """Add a movie to user's watch history"""
+    def _migrate_genre_masks(self):
+        """Fill genre_mask for rows written before the column existed"""
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
         
-        genres_str = json.dumps(genres)
-        cursor.execute('''
-            INSERT INTO watch_history (user_id, movie_id, movie_title, genres, rating)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (user_id, movie_id, movie_title, genres_str, rating))
+        tables = ('watch_history', 'user_likes')
+        pending = {}
+        for table in tables:
+            cursor.execute(
+                f'SELECT DISTINCT genres FROM {table} WHERE genre_mask IS NULL'
+            )
+            pending[table] = [genres_str for (genres_str,) in cursor.fetchall()]
+        
+        # Encode before any UPDATE: registering a new genre writes on another
+        # connection, which would hit "database is locked" behind our write
+        masks = {
+            genres_str: self.genres.encode(json.loads(genres_str) if genres_str else [])
+            for genres_str in {g for strings in pending.values() for g in strings}
+        }
+        for table in tables:
+            cursor.executemany(
+                f'UPDATE {table} SET genre_mask = ? WHERE genres IS ? AND genre_mask IS NULL',
+                [(masks[genres_str], genres_str) for genres_str in pending[table]]
+            )
         
         conn.commit()
         conn.close()
     
+    def add_to_history(self, user_id: str, movie_id: int, movie_title: str, 
+                       genres: List[str], rating: float = None):
+        """Add a movie to user's watch history"""
+        self.apply_events([{
+            'type': 'watch', 'user_id': user_id, 'movie_id': movie_id,
+            'title': movie_title, 'genres': genres, 'rating': rating
+        }])
+    
     def add_like(self, user_id: str, movie_id: int, movie_title: str, genres: List[str]):
         """Add a movie to user's liked movies"""
+        self.apply_events([{
+            'type': 'like', 'user_id': user_id, 'movie_id': movie_id,
+            'title': movie_title, 'genres': genres
+        }])
+    
+    def remove_like(self, user_id: str, movie_id: int):
+        """Remove a movie from user's liked movies"""
+        self.apply_events([{'type': 'unlike', 'user_id': user_id, 'movie_id': movie_id}])
+    
+    def subscribe(self, listener: Callable[[List[Dict]], None]):
+        """
+        Register a callback for committed history changes
+        
+        Called after each apply_events transaction with the events that
+        changed something (duplicate likes and unknown unlikes are left out).
+        Listener errors are logged, never raised to the writer.
+        """
+        self._listeners.append(listener)
+    
+    def apply_events(self, events: List[Dict]):
+        """
+        Apply watch, like and unlike events in a single transaction
+        
+        Args:
+            events: Dicts with 'type' ('watch', 'like' or 'unlike'), 'user_id',
+                'movie_id' and, for watch/like, 'title', 'genres' and 'rating'
+        """
+        if not events:
+            return
+        
+        # Encode first: new genres are registered on a separate connection,
+        # which must not wait on the write lock taken below
+        genre_masks = [self.genres.encode(event.get('genres') or []) for event in events]
+        
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
+        cursor.execute('BEGIN IMMEDIATE')
         
-        genres_str = json.dumps(genres)
+        # Each user's aggregate is read once and saved once per batch. None
+        # means there is no aggregate yet, so it is rebuilt after the inserts.
+        states = {}
+        changed = []
+        applied_events = []
         try:
-            cursor.execute('''
-                INSERT INTO user_likes (user_id, movie_id, movie_title, genres)
-                VALUES (?, ?, ?, ?)
-            ''', (user_id, movie_id, movie_title, genres_str))
+            for event, genre_mask in zip(events, genre_masks):
+                user_id = event['user_id']
+                if user_id not in states:
+                    states[user_id] = self._read_profile_state(cursor, user_id)
+                applied = self._apply_event(cursor, event, genre_mask, states[user_id])
+                if applied:
+                    applied_events.append(event)
+                    if user_id not in changed:
+                        changed.append(user_id)
+            
+            profiles = {
+                user_id: self._save_profile_state(cursor, user_id, states[user_id])
+                for user_id in changed
+            }
             conn.commit()
-        except sqlite3.IntegrityError:
-            pass  # Already liked
+        except Exception:
+            conn.rollback()
+            raise
         finally:
             conn.close()
+        
+        for user_id, profile in profiles.items():
+            self._cache_profile(user_id, profile)
+        
+        if applied_events:
+            for listener in self._listeners:
+                try:
+                    listener(applied_events)
+                except Exception as e:
+                    logger.error(f"History listener failed: {e}")
     
-    def remove_like(self, user_id: str, movie_id: int):
-        """Remove a movie from user's liked movies"""
+    def _apply_event(self, cursor: sqlite3.Cursor, event: Dict, genre_mask: int,
+                     state: Optional[Dict]) -> bool:
+        """Write one event's base row and fold it into the aggregate; returns whether anything changed"""
+        user_id, movie_id = event['user_id'], event['movie_id']
+        
+        if event['type'] == 'unlike':
+            cursor.execute('''
+                SELECT genre_mask FROM user_likes WHERE user_id = ? AND movie_id = ?
+            ''', (user_id, movie_id))
+            row = cursor.fetchone()
+            if row is None:
+                return False
+            
+            cursor.execute('''
+                DELETE FROM user_likes WHERE user_id = ? AND movie_id = ?
+            ''', (user_id, movie_id))
+            if state is not None:
+                self._apply_like(state, movie_id, row[0] or 0, -1)
+            return True
+        
+        genres_str = json.dumps(event.get('genres') or [])
+        
+        if event['type'] == 'like':
+            cursor.execute('''
+                INSERT OR IGNORE INTO user_likes (user_id, movie_id, movie_title, genres, genre_mask)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (user_id, movie_id, event.get('title'), genres_str, genre_mask))
+            if cursor.rowcount == 0:
+                return False  # Already liked
+            if state is not None:
+                self._apply_like(state, movie_id, genre_mask, 1)
+            return True
+        
+        if event['type'] == 'watch':
+            cursor.execute('''
+                INSERT INTO watch_history (user_id, movie_id, movie_title, genres, genre_mask, rating)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', (user_id, movie_id, event.get('title'), genres_str, genre_mask, event.get('rating')))
+            if state is not None:
+                self._apply_watch(state, movie_id, genre_mask)
+            return True
+        
+        raise ValueError(f"Unknown history event type: {event['type']}")
+    
+    def get_taste_profile(self, user_id: str) -> Dict:
+        """
+        Get the user's aggregated taste profile
+        
+        Served from the in-memory LRU when possible, otherwise from the
+        persisted user_profiles row, so the cost does not grow with history
+        length. Weights cover the full history and all likes.
+        """
+        with self._profile_lock:
+            entry = self._profile_cache.get(user_id)
+            if entry is not None and time.monotonic() - entry[0] < self.profile_cache_ttl:
+                self._profile_cache.move_to_end(user_id)
+                return entry[1]
+        
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
+        state = self._read_profile_state(cursor, user_id)
+        if state is None:
+            # No aggregate yet (new user or pre-existing rows): build it once
+            cursor.execute('BEGIN IMMEDIATE')
+            state = self._read_profile_state(cursor, user_id)
+            profile = self._save_profile_state(cursor, user_id, state)
+            conn.commit()
+        else:
+            profile = self._profile_from_state(user_id, state)
+        conn.close()
+        
+        self._cache_profile(user_id, profile)
+        return profile
+    
+    def _read_profile_state(self, cursor: sqlite3.Cursor, user_id: str) -> Optional[Dict]:
+        """
+        Read the persisted aggregate row for a user, if there is one
         
+        Writers that get None back save a full rebuild instead, which already
+        includes the row they just wrote.
+        """
         cursor.execute('''
-            DELETE FROM user_likes WHERE user_id = ? AND movie_id = ?
-        ''', (user_id, movie_id))
+            SELECT genre_weights, liked_ids, watched_ids, liked_count, watched_count, version
+            FROM user_profiles
+            WHERE user_id = ?
+        ''', (user_id,))
+        row = cursor.fetchone()
+        if row is None:
+            return None
         
-        conn.commit()
-        conn.close()
+        return {
+            'weights': np.array(json.loads(row[0]), dtype=np.int64),
+            'liked_ids': set(json.loads(row[1])),
+            'watched_ids': set(json.loads(row[2])),
+            'liked_count': row[3],
+            'watched_count': row[4],
+            'version': row[5]
+        }
+    
+    def _rebuild_profile_state(self, cursor: sqlite3.Cursor, user_id: str) -> Dict:
+        """Aggregate a user's full like and watch history from the base tables"""
+        cursor.execute('SELECT movie_id, genre_mask FROM user_likes WHERE user_id = ?', (user_id,))
+        likes = cursor.fetchall()
+        cursor.execute('SELECT movie_id, genre_mask FROM watch_history WHERE user_id = ?', (user_id,))
+        watched = cursor.fetchall()
+        
+        return {
+            'weights': genre_weight_vector((m or 0 for _, m in likes), (m or 0 for _, m in watched)),
+            'liked_ids': {movie_id for movie_id, _ in likes},
+            'watched_ids': {movie_id for movie_id, _ in watched},
+            'liked_count': len(likes),
+            'watched_count': len(watched),
+            'version': 0
+        }
+    
+    @staticmethod
+    def _apply_watch(state: Dict, movie_id: int, genre_mask: int):
+        state['weights'] = state['weights'] + masks_to_matrix([genre_mask])[0]
+        state['watched_ids'].add(movie_id)
+        state['watched_count'] += 1
+    
+    @staticmethod
+    def _apply_like(state: Dict, movie_id: int, genre_mask: int, direction: int):
+        state['weights'] = state['weights'] + 2 * direction * masks_to_matrix([genre_mask])[0]
+        if direction > 0:
+            state['liked_ids'].add(movie_id)
+        else:
+            state['liked_ids'].discard(movie_id)
+        state['liked_count'] += direction
+    
+    def _save_profile_state(self, cursor: sqlite3.Cursor, user_id: str,
+                            state: Optional[Dict]) -> Dict:
+        """Persist an aggregate (rebuilding it if missing) and return the profile"""
+        if state is None:
+            state = self._rebuild_profile_state(cursor, user_id)
+        state['version'] += 1
+        
+        cursor.execute('''
+            INSERT OR REPLACE INTO user_profiles
+                (user_id, genre_weights, liked_ids, watched_ids,
+                 liked_count, watched_count, version, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+        ''', (
+            user_id,
+            json.dumps(state['weights'].tolist()),
+            json.dumps(sorted(state['liked_ids'])),
+            json.dumps(sorted(state['watched_ids'])),
+            state['liked_count'],
+            state['watched_count'],
+            state['version']
+        ))
+        
+        return self._profile_from_state(user_id, state)
+    
+    def _profile_from_state(self, user_id: str, state: Dict) -> Dict:
+        """Derive the lookup fields rankers need from an aggregate"""
+        weights = state['weights']
+        
+        # Top 5 genres by weight
+        ranked_bits = np.argsort(-weights, kind='stable')[:5]
+        favorite_mask = bits_to_mask(b for b in ranked_bits if weights[b] > 0)
+        
+        weighted_bits = np.flatnonzero(weights)
+        weighted_mask = bits_to_mask(weighted_bits)
+        
+        return {
+            'user_id': user_id,
+            'favorite_genres': self.genres.decode(favorite_mask),
+            'favorite_mask': favorite_mask,
+            'genre_weights': dict(zip(self.genres.decode(weighted_mask), weights[weighted_bits].tolist())),
+            'weight_vector': weights,
+            'max_weight': int(weights.max()),
+            'liked_count': state['liked_count'],
+            'watched_count': state['watched_count'],
+            'liked_ids': frozenset(state['liked_ids']),
+            'watched_ids': frozenset(state['watched_ids']),
+            'interacted_ids': frozenset(state['liked_ids'] | state['watched_ids']),
+            'version': state['version']
+        }
+    
+    def _cache_profile(self, user_id: str, profile: Dict):
+        with self._profile_lock:
+            self._profile_cache[user_id] = (time.monotonic(), profile)
+            self._profile_cache.move_to_end(user_id)
+            while len(self._profile_cache) > self.profile_cache_size:
+                self._profile_cache.popitem(last=False)
     
     def get_watch_history(self, user_id: str, limit: int = 50) -> List[Dict]:
         """Get user's watch history"""
@@ -106,7 +536,7 @@ class UserHistoryManager:
         cursor = conn.cursor()
         
         cursor.execute('''
-            SELECT movie_id, movie_title, genres, rating, watched_at
+            SELECT movie_id, movie_title, genre_mask, rating, watched_at
             FROM watch_history
             WHERE user_id = ?
             ORDER BY watched_at DESC
@@ -118,7 +548,8 @@ class UserHistoryManager:
             history.append({
                 'movie_id': row[0],
                 'title': row[1],
-                'genres': json.loads(row[2]),
+                'genres': self.genres.decode(row[2]),
+                'genre_mask': row[2],
                 'rating': row[3],
                 'watched_at': row[4]
             })
@@ -132,7 +563,7 @@ class UserHistoryManager:
         cursor = conn.cursor()
         
         cursor.execute('''
-            SELECT movie_id, movie_title, genres, liked_at
+            SELECT movie_id, movie_title, genre_mask, liked_at
             FROM user_likes
             WHERE user_id = ?
             ORDER BY liked_at DESC
@@ -143,7 +574,8 @@ class UserHistoryManager:
             likes.append({
                 'movie_id': row[0],
                 'title': row[1],
-                'genres': json.loads(row[2]),
+                'genres': self.genres.decode(row[2]),
+                'genre_mask': row[2],
                 'liked_at': row[3]
             })
         
@@ -177,13 +609,81 @@ class UserHistoryManager:
         return count
 
 
+class AsyncUserHistoryManager:
+    """Async facade running UserHistoryManager's blocking SQLite calls on a bounded thread pool"""
+    
+    def __init__(self, history_manager: UserHistoryManager, max_workers: int = 4):
+        self.history_manager = history_manager
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="user-history"
+        )
+    
+    async def run(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run a blocking callable on the history executor and await its result"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, functools.partial(func, *args, **kwargs)
+        )
+    
+    async def add_to_history(self, user_id: str, movie_id: int, movie_title: str,
+                             genres: List[str], rating: float = None):
+        """Add a movie to user's watch history"""
+        await self.run(self.history_manager.add_to_history,
+                       user_id, movie_id, movie_title, genres, rating)
+    
+    async def add_like(self, user_id: str, movie_id: int, movie_title: str, genres: List[str]):
+        """Add a movie to user's liked movies"""
+        await self.run(self.history_manager.add_like, user_id, movie_id, movie_title, genres)
+    
+    async def remove_like(self, user_id: str, movie_id: int):
+        """Remove a movie from user's liked movies"""
+        await self.run(self.history_manager.remove_like, user_id, movie_id)
+    
+    async def get_watch_history(self, user_id: str, limit: int = 50) -> List[Dict]:
+        """Get user's watch history"""
+        return await self.run(self.history_manager.get_watch_history, user_id, limit)
+    
+    async def get_liked_movies(self, user_id: str) -> List[Dict]:
+        """Get user's liked movies"""
+        return await self.run(self.history_manager.get_liked_movies, user_id)
+    
+    async def get_user_profile(self, user_id: str) -> Dict:
+        """Get comprehensive user profile"""
+        return await self.run(self.history_manager.get_user_profile, user_id)
+    
+    async def get_taste_profile(self, user_id: str) -> Dict:
+        """Get the user's aggregated taste profile"""
+        return await self.run(self.history_manager.get_taste_profile, user_id)
+    
+    def close(self):
+        """Wait for queued calls to finish and stop the executor threads"""
+        self._executor.shutdown(wait=True)
+
+
 class PersonalizedRecommender:
     """Generates personalized recommendations using cosine similarity"""
     
-    def __init__(self, history_manager: UserHistoryManager):
+    def __init__(self, history_manager: UserHistoryManager,
+                 async_history: Optional[AsyncUserHistoryManager] = None):
         self.history_manager = history_manager
+        # A facade passed in belongs to the caller; one made here is closed by close()
+        self._async_history = async_history
+        self._owns_async_history = async_history is None
         self.vectorizer = TfidfVectorizer()
     
+    @property
+    def async_history(self) -> AsyncUserHistoryManager:
+        """History facade for the async API, created on first use if none was passed"""
+        if self._async_history is None:
+            self._async_history = AsyncUserHistoryManager(self.history_manager)
+        return self._async_history
+    
+    def close(self):
+        """Stop the history executor if this recommender created it"""
+        if self._owns_async_history and self._async_history is not None:
+            self._async_history.close()
+            self._async_history = None
+    
     def get_recommendations(self, user_id: str, candidate_movies: List[Dict], 
                            top_n: int = 10) -> List[Dict]:
         """
@@ -197,108 +697,89 @@ class PersonalizedRecommender:
         Returns:
             List of recommended movies with similarity scores
         """
-        # Get user profile
-        liked_movies = self.history_manager.get_liked_movies(user_id)
-        watch_history = self.history_manager.get_watch_history(user_id, limit=20)
+        user_profile = self.history_manager.get_taste_profile(user_id)
+        return self._rank_candidates(user_profile, candidate_movies, top_n)
+    
+    async def get_recommendations_async(self, user_id: str, candidate_movies: List[Dict],
+                                        top_n: int = 10) -> List[Dict]:
+        """
+        Async variant of get_recommendations for use inside request handlers
         
-        if not liked_movies and not watch_history:
+        The profile lookup runs on the history executor so the event loop stays
+        free; ranking itself is in-memory and runs inline.
+        """
+        user_profile = await self.async_history.run(
+            self.history_manager.get_taste_profile, user_id
+        )
+        return self._rank_candidates(user_profile, candidate_movies, top_n)
+    
+    def _rank_candidates(self, user_profile: Dict, candidate_movies: List[Dict],
+                         top_n: int) -> List[Dict]:
+        """Score and order candidates against a user's taste profile"""
+        if not user_profile['liked_count'] and not user_profile['watched_count']:
             # New user - return popular movies
             return candidate_movies[:top_n]
         
-        # Build user taste profile from liked movies and watch history
-        user_profile = self._build_user_profile(liked_movies, watch_history)
-        
-        # Calculate similarity scores
-        recommendations = []
-        for movie in candidate_movies:
-            # Skip if already watched or liked
-            movie_id = movie.get('id')
-            if self._is_already_interacted(user_id, movie_id):
-                continue
-            
-            similarity = self._calculate_similarity(user_profile, movie)
-            recommendations.append({
-                **movie,
-                'similarity_score': similarity,
-                'recommendation_reason': self._get_reason(user_profile, movie)
-            })
-        
-        # Sort by similarity score
-        recommendations.sort(key=lambda x: x['similarity_score'], reverse=True)
-        
-        return recommendations[:top_n]
+        # Skip anything already watched or liked
+        interacted_ids = user_profile['interacted_ids']
+        candidates = [m for m in candidate_movies if m.get('id') not in interacted_ids]
+        if not candidates or top_n <= 0:
+            return []
+        
+        scores = self._score_candidates(user_profile, candidates)
+        
+        # Partial selection of the top N, then order just those (ties keep input order)
+        k = min(top_n, len(candidates))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.lexsort((top, -scores[top]))]
+        
+        return [
+            {
+                **candidates[i],
+                'similarity_score': float(scores[i]),
+                'recommendation_reason': self._get_reason(user_profile, candidates[i])
+            }
+            for i in top
+        ]
     
-    def _build_user_profile(self, liked_movies: List[Dict], 
-                           watch_history: List[Dict]) -> Dict:
-        """Build user taste profile from interactions"""
-        all_genres = []
-        favorite_genres = {}
-        
-        # Weight liked movies more heavily
-        for movie in liked_movies:
-            for genre in movie['genres']:
-                all_genres.append(genre)
-                favorite_genres[genre] = favorite_genres.get(genre, 0) + 2
-        
-        # Add watch history with lower weight
-        for movie in watch_history:
-            for genre in movie['genres']:
-                all_genres.append(genre)
-                favorite_genres[genre] = favorite_genres.get(genre, 0) + 1
-        
-        # Get top genres
-        sorted_genres = sorted(favorite_genres.items(), key=lambda x: x[1], reverse=True)
-        top_genres = [g[0] for g in sorted_genres[:5]]
-        
-        return {
-            'all_genres': all_genres,
-            'favorite_genres': top_genres,
-            'genre_weights': favorite_genres,
-            'liked_count': len(liked_movies),
-            'watched_count': len(watch_history)
-        }
-    
-    def _calculate_similarity(self, user_profile: Dict, movie: Dict) -> float:
-        """Calculate cosine similarity between user profile and movie"""
-        # Genre-based similarity
-        movie_genres = set(movie.get('genres', []))
-        user_genres = set(user_profile['favorite_genres'])
-        
-        if not user_genres:
-            return 0.0
-        
-        # Jaccard similarity for genres
-        genre_intersection = len(movie_genres & user_genres)
-        genre_union = len(movie_genres | user_genres)
-        genre_similarity = genre_intersection / genre_union if genre_union > 0 else 0.0
+    def _score_candidates(self, user_profile: Dict, candidate_movies: List[Dict]) -> np.ndarray:
+        """Score a batch of candidates against the profile in one pass over a genre matrix"""
+        genres = self.history_manager.genres
+        genre_matrix = masks_to_matrix(genres.mask_of(m) for m in candidate_movies)
+        favorite = masks_to_matrix([user_profile['favorite_mask']])[0]
+        
+        # Jaccard similarity between each candidate's genres and the favorite genres
+        intersection = (genre_matrix & favorite).sum(axis=1)
+        union = (genre_matrix | favorite).sum(axis=1)
+        genre_similarity = np.divide(
+            intersection, union, out=np.zeros(len(candidate_movies)), where=union > 0
+        )
         
         # Weight by user's genre preferences
-        genre_weight_score = sum(
-            user_profile['genre_weights'].get(g, 0) 
-            for g in movie_genres
-        ) / max(user_profile['genre_weights'].values()) if user_profile['genre_weights'] else 0.0
+        max_weight = user_profile['max_weight']
+        genre_weight_score = (
+            genre_matrix @ user_profile['weight_vector'] / max_weight
+            if max_weight else np.zeros(len(candidate_movies))
+        )
         
         # Combine scores
-        final_score = (genre_similarity * 0.6) + (genre_weight_score * 0.4)
+        final_scores = (genre_similarity * 0.6) + (genre_weight_score * 0.4)
+        if not user_profile['favorite_mask']:
+            final_scores[:] = 0.0
         
-        return round(final_score, 4)
+        return np.round(final_scores, 4)
     
-    def _is_already_interacted(self, user_id: str, movie_id: int) -> bool:
-        """Check if user has already watched or liked this movie"""
-        liked = self.history_manager.get_liked_movies(user_id)
-        watched = self.history_manager.get_watch_history(user_id)
-        
-        liked_ids = {m['movie_id'] for m in liked}
-        watched_ids = {m['movie_id'] for m in watched}
-        
-        return movie_id in liked_ids or movie_id in watched_ids
+    def _calculate_similarity(self, user_profile: Dict, movie: Dict) -> float:
+        """Calculate similarity between user profile and a single movie"""
+        return float(self._score_candidates(user_profile, [movie])[0])
     
     def _get_reason(self, user_profile: Dict, movie: Dict) -> str:
         """Generate recommendation reason (preview for Level 3)"""
-        matching_genres = set(movie.get('genres', [])) & set(user_profile['favorite_genres'])
+        genres = self.history_manager.genres
+        matching_mask = genres.mask_of(movie) & user_profile['favorite_mask']
         
-        if matching_genres:
-            genre_list = ', '.join(list(matching_genres)[:2])
+        if matching_mask:
+            genre_list = ', '.join(genres.decode(matching_mask)[:2])
             return f"Matches your interest in {genre_list}"
         
         return "Based on your viewing history"
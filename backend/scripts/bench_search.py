@@ -0,0 +1,109 @@
+"""
+Title search latency benchmark
+
+Builds a synthetic catalog of 100k+ titles from the MovieLens title words and
+compares the in-process trigram index (backend.app.search.TitleSearchIndex)
+against the linear scan an unindexed ILIKE '%q%' performs, then times prefix
+autocomplete (TitleAutocomplete). With --database-url, also times
+search_titles against that database (pg_trgm on Postgres).
+
+Usage:
+    python -m backend.scripts.bench_search
+    python -m backend.scripts.bench_search --titles 250000 --repeat 50
+    python -m backend.scripts.bench_search --database-url postgresql://...
+"""
+
+import argparse
+import csv
+import os
+import random
+import re
+import sys
+import time
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+
+# Add project root to path
+sys.path.append(os.getcwd())
+from backend.app.search import TitleAutocomplete, TitleSearchIndex, normalize, popularity_score
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "ml-latest-small")
+
+PREFIXES = ["s", "st", "star", "the god", "ame", "zz"]
+QUERIES = ["star", "the godfather", "amelie", "lord of the", "termintor", "pulp", "ma", "zzqx"]
+
+
+def synthetic_titles(count: int, data_dir: str = DATA_DIR, seed: int = 42) -> List[Tuple[int, str, float]]:
+    """Real MovieLens titles plus recombinations of their words, with skewed popularity"""
+    with open(os.path.join(data_dir, "movies.csv"), newline="", encoding="utf-8") as f:
+        titles = [re.sub(r"\s*\(\d{4}\)\s*$", "", row["title"]) for row in csv.DictReader(f)]
+    words = [w for t in titles for w in t.split()]
+
+    rng = random.Random(seed)
+    while len(titles) < count:
+        titles.append(" ".join(rng.choice(words) for _ in range(rng.randint(1, 5))))
+    return [(i + 1, title, rng.paretovariate(1.5)) for i, title in enumerate(titles[:count])]
+
+
+def naive_search(rows: List[Tuple[int, str, float]], query: str, limit: int = 20) -> List[int]:
+    """What ILIKE '%q%' does without an index: casefold and test every title"""
+    q = normalize(query)
+    hits = [(popularity_score(pop), movie_id) for movie_id, title, pop in rows if q in normalize(title)]
+    hits.sort(key=lambda h: (-h[0], h[1]))
+    return [movie_id for _, movie_id in hits[:limit]]
+
+
+def time_queries(search: Callable[[str], object], queries: List[str], repeat: int) -> Dict[str, float]:
+    """p50 and p95 latency in milliseconds over every query, repeated"""
+    samples = []
+    for _ in range(repeat):
+        for query in queries:
+            start = time.perf_counter()
+            search(query)
+            samples.append((time.perf_counter() - start) * 1000)
+    return {"p50": float(np.percentile(samples, 50)), "p95": float(np.percentile(samples, 95))}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark title search latency")
+    parser.add_argument("--titles", type=int, default=120000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--database-url", default=None,
+                        help="Also time search_titles against this database's movies table")
+    args = parser.parse_args()
+
+    rows = synthetic_titles(args.titles)
+    start = time.perf_counter()
+    index = TitleSearchIndex(rows)
+    print(f"Indexed {len(index)} titles ({len(index.postings)} trigrams) in {time.perf_counter() - start:.2f}s")
+
+    for query in QUERIES:
+        results = index.search(query, limit=3)
+        print(f"  {query!r:16} -> {[rows[movie_id - 1][1] for movie_id, _ in results]}")
+
+    indexed = time_queries(lambda q: index.search(q), QUERIES, args.repeat)
+    naive = time_queries(lambda q: naive_search(rows, q), QUERIES, max(args.repeat // 10, 1))
+    print(f"Trigram index: p50 {indexed['p50']:.2f} ms, p95 {indexed['p95']:.2f} ms")
+    print(f"Linear scan:   p50 {naive['p50']:.2f} ms, p95 {naive['p95']:.2f} ms")
+
+    autocomplete = TitleAutocomplete((movie_id, title, pop, None, None) for movie_id, title, pop in rows)
+    completions = time_queries(lambda p: autocomplete.complete(p), PREFIXES, args.repeat * 10)
+    print(f"Autocomplete:  p50 {completions['p50']:.3f} ms, p95 {completions['p95']:.3f} ms "
+          f"({len(autocomplete.keys)} keys)")
+
+    if args.database_url:
+        from sqlalchemy import create_engine
+        from sqlalchemy.orm import sessionmaker
+        from backend.app.search import ensure_search_index, search_titles
+
+        engine = create_engine(args.database_url)
+        ensure_search_index(engine)
+        with sessionmaker(bind=engine)() as db:
+            search_titles(db, QUERIES[0])  # Warm up (builds the fallback index off Postgres)
+            database = time_queries(lambda q: search_titles(db, q), QUERIES, args.repeat)
+        print(f"search_titles ({engine.dialect.name}): p50 {database['p50']:.2f} ms, p95 {database['p95']:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+"""
+Bulk catalog sync: joins ml-latest-small/links.csv to TMDB metadata
+
+Fetches details and credits for every tmdbId in links.csv and upserts them
+into the Movie and Genre tables, so ranking can read a local catalog
+(backend.backend.catalog.LocalCatalog) instead of calling TMDB per request.
+Incremental runs only fetch links that are not synced yet plus titles that
+TMDB's /movie/changes feed reports as changed since the last sync. The same
+credits feed the talent index (backend.backend.talent_index.TalentIndex) that
+explanations read director and actor reasons from.
+
+Usage:
+    python -m backend.scripts.sync_catalog                 # incremental
+    python -m backend.scripts.sync_catalog --full          # refetch every title
+    python -m backend.scripts.sync_catalog --since 2024-05-01
+    python -m backend.scripts.sync_catalog --database-url sqlite:///catalog.db
+    python -m backend.scripts.sync_catalog --talent-index ""   # skip the talent index
+"""
+
+import argparse
+import asyncio
+import csv
+import logging
+import os
+import sys
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import create_engine, func
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import selectinload, sessionmaker
+
+# Add project root to path
+sys.path.append(os.getcwd())
+from backend.app.core.config import settings
+from backend.app.database import Base, upgrade_table
+from backend.app.models.all_models import Genre, Movie
+from backend.app.search import ensure_search_index
+from backend.backend.talent_index import TalentIndex
+from backend.backend.tmdb_client import TMDBClient, TMDBError
+from backend.backend.tmdb_scheduler import BACKGROUND
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "ml-latest-small")
+# TMDB serves at most 14 days of /movie/changes per request
+CHANGES_WINDOW_DAYS = 14
+TOP_CAST = 5
+
+
+def load_links(data_dir: str = DATA_DIR) -> Dict[int, int]:
+    """Map tmdbId -> MovieLens movieId from links.csv"""
+    links = {}
+    with open(os.path.join(data_dir, "links.csv"), newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            if row["tmdbId"]:
+                links[int(row["tmdbId"])] = int(row["movieId"])
+    return links
+
+
+def ensure_schema(engine: Engine):
+    """Create missing tables, then add catalog columns to a movies table that predates them"""
+    Base.metadata.create_all(bind=engine)
+    upgrade_table(engine, Movie.__table__)
+    ensure_search_index(engine)
+
+
+def last_synced(engine: Engine) -> Optional[date]:
+    """Date of the most recent catalog write, or None if nothing is synced yet"""
+    with sessionmaker(bind=engine)() as session:
+        latest = session.query(func.max(Movie.updated_at)).filter(Movie.movielens_id.isnot(None)).scalar()
+    if latest is None:
+        return None
+    if isinstance(latest, str):
+        # SQLite hands DateTime aggregates back as text
+        latest = datetime.fromisoformat(latest)
+    return latest.date()
+
+
+async def fetch_changed_ids(client: TMDBClient, since: date) -> Set[int]:
+    """IDs TMDB reports as changed from `since` to today, walking 14-day windows"""
+    changed = set()
+    start, today = since, datetime.now(timezone.utc).date()
+    while start <= today:
+        end = min(start + timedelta(days=CHANGES_WINDOW_DAYS - 1), today)
+        page, total_pages = 1, 1
+        while page <= total_pages:
+            try:
+                data = await client.get("/movie/changes", {
+                    "start_date": start.isoformat(), "end_date": end.isoformat(), "page": page
+                }, priority=BACKGROUND)
+            except TMDBError as e:
+                # New links still sync; changed titles are picked up on the next run
+                logger.error(f"Error reading TMDB changes from {start}: {e.status_code}")
+                return changed
+            changed.update(item["id"] for item in data.get("results", []) if not item.get("adult"))
+            total_pages = data.get("total_pages", 1)
+            page += 1
+        start = end + timedelta(days=1)
+    return changed
+
+
+async def fetch_details(client: TMDBClient, tmdb_ids: List[int]) -> List[Tuple[int, Optional[Dict]]]:
+    """Details with credits for each ID; None where TMDB has no such movie or the call failed"""
+    async def one(tmdb_id: int):
+        try:
+            return tmdb_id, await client.get(
+                f"/movie/{tmdb_id}", {"append_to_response": "credits"}, priority=BACKGROUND
+            )
+        except TMDBError as e:
+            logger.warning(f"Skipping movie {tmdb_id}: TMDB returned {e.status_code}")
+            return tmdb_id, None
+
+    return await asyncio.gather(*[one(tmdb_id) for tmdb_id in tmdb_ids])
+
+
+def upsert_movies(Session: sessionmaker, batch: Iterable[Tuple[int, Optional[Dict]]],
+                  links: Dict[int, int]) -> int:
+    """Write one batch of TMDB details into movies/genres; returns the rows written"""
+    batch = [(tmdb_id, details) for tmdb_id, details in batch if details]
+    if not batch:
+        return 0
+
+    now = datetime.now(timezone.utc)
+    with Session() as session:
+        existing = {
+            m.tmdb_id: m for m in session.query(Movie)
+            .options(selectinload(Movie.genres))
+            .filter(Movie.tmdb_id.in_([tmdb_id for tmdb_id, _ in batch]))
+        }
+        genre_ids = {g["id"] for _, details in batch for g in details.get("genres", [])}
+        genres = {g.tmdb_id: g for g in session.query(Genre).filter(Genre.tmdb_id.in_(genre_ids))}
+
+        for tmdb_id, details in batch:
+            movie = existing.get(tmdb_id)
+            if movie is None:
+                movie = Movie(tmdb_id=tmdb_id)
+                session.add(movie)
+
+            credits = details.get("credits") or {}
+            directors = [c["name"] for c in credits.get("crew", []) if c.get("job") == "Director"]
+
+            movie.movielens_id = links.get(tmdb_id)
+            movie.title = details.get("title") or details.get("original_title") or ""
+            movie.overview = details.get("overview")
+            movie.release_date = details.get("release_date")
+            movie.poster_path = details.get("poster_path")
+            movie.backdrop_path = details.get("backdrop_path")
+            movie.vote_average = details.get("vote_average") or 0.0
+            movie.vote_count = details.get("vote_count") or 0
+            movie.popularity = details.get("popularity") or 0.0
+            movie.runtime = details.get("runtime")
+            movie.tagline = details.get("tagline")
+            movie.budget = details.get("budget") or 0
+            movie.revenue = details.get("revenue") or 0
+            movie.director = directors[0] if directors else None
+            movie.top_cast = [c["name"] for c in credits.get("cast", [])[:TOP_CAST]]
+            # Set explicitly: onupdate only fires when some other column changed
+            movie.updated_at = now
+
+            movie_genres = []
+            for g in details.get("genres", []):
+                genre = genres.get(g["id"])
+                if genre is None:
+                    genre = genres[g["id"]] = Genre(tmdb_id=g["id"], name=g["name"])
+                    session.add(genre)
+                genre.name = g["name"]
+                movie_genres.append(genre)
+            movie.genres = movie_genres
+
+        session.commit()
+    return len(batch)
+
+
+async def sync_catalog(engine: Engine, client: TMDBClient, full: bool = False,
+                       since: Optional[date] = None, data_dir: str = DATA_DIR,
+                       batch_size: int = 200, talent_index: Optional[TalentIndex] = None) -> Dict:
+    """
+    Sync links.csv titles from TMDB into the catalog tables
+
+    Args:
+        engine: Database holding the Movie and Genre tables
+        client: TMDB client (BACKGROUND priority is used throughout)
+        full: Refetch every linked title instead of only new and changed ones
+        since: Start of the /movie/changes window (defaults to the last sync date)
+        data_dir: Directory containing links.csv
+        batch_size: Titles fetched concurrently and committed per transaction
+        talent_index: Also index each title's director and top-cast IDs here
+
+    Returns:
+        Counts of linked, requested and written titles, and talent index updates
+    """
+    ensure_schema(engine)
+    Session = sessionmaker(bind=engine)
+    links = load_links(data_dir)
+
+    if full:
+        to_fetch = set(links)
+    else:
+        with Session() as session:
+            synced = {tmdb_id for (tmdb_id,) in session.query(Movie.tmdb_id).filter(Movie.movielens_id.isnot(None))}
+        to_fetch = set(links) - synced
+        since = since or last_synced(engine)
+        if since is not None:
+            changed = await fetch_changed_ids(client, since) & synced
+            logger.info(f"{len(changed)} synced titles changed since {since}")
+            to_fetch |= changed
+
+    tmdb_ids = sorted(to_fetch)
+    batches = [tmdb_ids[i:i + batch_size] for i in range(0, len(tmdb_ids), batch_size)]
+    written = talent = 0
+
+    # Fetch the next batch while the previous one is written
+    pending = asyncio.ensure_future(fetch_details(client, batches[0])) if batches else None
+    for i in range(len(batches)):
+        details = await pending
+        pending = asyncio.ensure_future(fetch_details(client, batches[i + 1])) if i + 1 < len(batches) else None
+        written += await asyncio.to_thread(upsert_movies, Session, details, links)
+        if talent_index is not None:
+            credits = [(tmdb_id, d.get("credits") or {}) for tmdb_id, d in details if d]
+            talent += await asyncio.to_thread(talent_index.index_credits, credits)
+        logger.info(f"Synced {written}/{len(tmdb_ids)} titles")
+
+    return {"linked": len(links), "requested": len(tmdb_ids), "written": written, "talent": talent}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sync the local movie catalog from TMDB")
+    parser.add_argument("--full", action="store_true", help="Refetch every title in links.csv")
+    parser.add_argument("--since", type=date.fromisoformat, default=None,
+                        help="Start date (YYYY-MM-DD) for the TMDB changes feed")
+    parser.add_argument("--database-url", default=None,
+                        help="Defaults to the configured Postgres database")
+    parser.add_argument("--data-dir", default=DATA_DIR)
+    parser.add_argument("--batch-size", type=int, default=200)
+    parser.add_argument("--talent-index", default=os.getenv("TALENT_INDEX_PATH", "talent_index.db"),
+                        help="SQLite file for director/cast IDs used by explanations (\"\" to skip)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    engine = create_engine(args.database_url or settings.SQLALCHEMY_DATABASE_URI)
+    talent_index = TalentIndex(args.talent_index) if args.talent_index else None
+
+    async def run():
+        async with TMDBClient() as client:
+            return await sync_catalog(engine, client, full=args.full, since=args.since,
+                                      data_dir=args.data_dir, batch_size=args.batch_size,
+                                      talent_index=talent_index)
+
+    result = asyncio.run(run())
+    print(f"Catalog sync done: {result['written']} of {result['requested']} requested titles written "
+          f"({result['linked']} linked in links.csv), {result['talent']} talent index updates")
+
+
+if __name__ == "__main__":
+    main()
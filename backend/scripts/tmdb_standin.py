@@ -0,0 +1,310 @@
+"""
+Local TMDB stand-in server for offline load and latency testing
+
+Serves deterministic fixtures generated from ml-latest-small (every tmdbId in
+links.csv, titled and tagged from movies.csv) on TMDB's /3 URL layout, with
+optional latency, error and 429 injection. In record mode, requests are
+proxied to the real API and the responses saved so later runs replay them.
+
+Usage:
+    python -m backend.scripts.tmdb_standin --port 8001 --latency-ms 80 --rate-limit-rate 0.02
+    TMDB_BASE_URL=http://localhost:8001/3 TMDB_API_KEY=test uvicorn main:app
+"""
+
+import argparse
+import asyncio
+import csv
+import hashlib
+import json
+import os
+import random
+import re
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional
+
+import httpx
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "ml-latest-small")
+REAL_TMDB_URL = "https://api.themoviedb.org/3"
+PAGE_SIZE = 20
+
+# MovieLens genre -> (TMDB genre id, TMDB genre name)
+GENRE_MAP = {
+    "Action": (28, "Action"), "Adventure": (12, "Adventure"), "Animation": (16, "Animation"),
+    "Children": (10751, "Family"), "Comedy": (35, "Comedy"), "Crime": (80, "Crime"),
+    "Documentary": (99, "Documentary"), "Drama": (18, "Drama"), "Fantasy": (14, "Fantasy"),
+    "Film-Noir": (80, "Crime"), "Horror": (27, "Horror"), "Musical": (10402, "Music"),
+    "Mystery": (9648, "Mystery"), "Romance": (10749, "Romance"),
+    "Sci-Fi": (878, "Science Fiction"), "Thriller": (53, "Thriller"), "War": (10752, "War"),
+    "Western": (37, "Western"),
+}
+
+# Shared talent pools so generated credits overlap across movies
+DIRECTOR_POOL = 400
+ACTOR_POOL = 3000
+
+
+def load_fixture_movies(data_dir: str = DATA_DIR) -> Dict[int, Dict]:
+    """Build one synthetic TMDB movie per tmdbId in links.csv"""
+    titles = {}
+    with open(os.path.join(data_dir, "movies.csv"), newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            titles[row["movieId"]] = (row["title"], row["genres"])
+
+    movies = {}
+    with open(os.path.join(data_dir, "links.csv"), newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            if not row["tmdbId"] or row["movieId"] not in titles:
+                continue
+            tmdb_id = int(row["tmdbId"])
+            title, genres = titles[row["movieId"]]
+            movies[tmdb_id] = _synthesize_movie(tmdb_id, title, genres.split("|"))
+    return movies
+
+
+def _synthesize_movie(tmdb_id: int, ml_title: str, ml_genres: List[str]) -> Dict:
+    # Seeded per movie so every run (and every worker) serves identical data
+    rng = random.Random(tmdb_id)
+    match = re.match(r"^(.*?)\s*\((\d{4})\)\s*$", ml_title)
+    title, year = (match.group(1), match.group(2)) if match else (ml_title, "2000")
+
+    genres = []
+    for g in ml_genres:
+        if g in GENRE_MAP and GENRE_MAP[g] not in genres:
+            genres.append(GENRE_MAP[g])
+
+    director_id = rng.randrange(DIRECTOR_POOL) + 1
+    cast_ids = rng.sample(range(1, ACTOR_POOL + 1), 8)
+    return {
+        "id": tmdb_id,
+        "title": title,
+        "original_title": title,
+        "overview": f"{title} is a {', '.join(n for _, n in genres).lower() or 'feature'} film from {year}.",
+        "release_date": f"{year}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+        "runtime": rng.randint(80, 170),
+        "vote_average": round(rng.uniform(4.0, 8.9), 1),
+        "vote_count": int(rng.lognormvariate(6.5, 1.5)),
+        "popularity": round(rng.lognormvariate(2.5, 1.2), 3),
+        "budget": rng.randrange(0, 200) * 1_000_000,
+        "revenue": rng.randrange(0, 800) * 1_000_000,
+        "tagline": "",
+        "poster_path": f"/{hashlib.md5(str(tmdb_id).encode()).hexdigest()[:27]}.jpg",
+        "backdrop_path": None,
+        "genres": [{"id": gid, "name": name} for gid, name in genres],
+        "credits": {
+            "id": tmdb_id,
+            "cast": [
+                {"id": pid, "name": f"Actor {pid}", "character": f"Role {i + 1}", "order": i}
+                for i, pid in enumerate(cast_ids)
+            ],
+            "crew": [{"id": 100000 + director_id, "name": f"Director {director_id}", "job": "Director"}],
+        },
+    }
+
+
+def _list_item(movie: Dict) -> Dict:
+    """The reduced shape TMDB uses in list/search results"""
+    detail_only = ("credits", "genres", "runtime", "budget", "revenue", "tagline")
+    item = {k: v for k, v in movie.items() if k not in detail_only}
+    item["genre_ids"] = [g["id"] for g in movie["genres"]]
+    return item
+
+
+def _page(items: List[Dict], page: int) -> Dict:
+    total = len(items)
+    start = (page - 1) * PAGE_SIZE
+    return {
+        "page": page,
+        "results": items[start:start + PAGE_SIZE],
+        "total_pages": max((total + PAGE_SIZE - 1) // PAGE_SIZE, 1),
+        "total_results": total,
+    }
+
+
+def _record_key(path: str, params: Dict) -> str:
+    params = {k: v for k, v in params.items() if k != "api_key"}
+    raw = path + "?" + "&".join(f"{k}={params[k]}" for k in sorted(params))
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+def create_app(movies: Optional[Dict[int, Dict]] = None, latency_ms: float = 0.0,
+               jitter_ms: float = 0.0, error_rate: float = 0.0,
+               rate_limit_rate: float = 0.0, retry_after: int = 1,
+               fixtures_dir: Optional[str] = None, record_api_key: Optional[str] = None,
+               seed: int = 0) -> FastAPI:
+    """
+    Build the stand-in app
+
+    Args:
+        movies: tmdbId -> movie fixture (defaults to load_fixture_movies())
+        latency_ms / jitter_ms: Added delay per request (mean, +/- uniform jitter)
+        error_rate: Fraction of requests answered with 500
+        rate_limit_rate: Fraction answered with 429 and a Retry-After header
+        retry_after: Seconds sent in Retry-After
+        fixtures_dir: Recorded responses are replayed from (and saved to) here
+        record_api_key: If set, unrecorded requests are proxied to real TMDB and saved
+        seed: Seed for the fault-injection RNG
+    """
+    movies = movies if movies is not None else load_fixture_movies()
+    by_popularity = sorted(movies.values(), key=lambda m: m["popularity"], reverse=True)
+    by_trend = sorted(movies.values(), key=lambda m: hashlib.md5(str(m["id"]).encode()).digest())
+    rng = random.Random(seed)
+    stats = {"requests": 0, "errors": 0, "rate_limited": 0, "recorded": 0, "replayed": 0}
+
+    upstream = httpx.AsyncClient(base_url=REAL_TMDB_URL, timeout=30.0) if record_api_key else None
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        yield
+        if upstream is not None:
+            await upstream.aclose()
+
+    app = FastAPI(title="TMDB stand-in", lifespan=lifespan)
+    app.state.stats = stats
+
+    @app.middleware("http")
+    async def inject_faults(request: Request, call_next):
+        # The stand-in's own routes are never delayed, faulted, replayed or proxied
+        if request.url.path.startswith("/_standin/"):
+            return await call_next(request)
+        stats["requests"] += 1
+        if latency_ms or jitter_ms:
+            await asyncio.sleep(max(latency_ms + rng.uniform(-jitter_ms, jitter_ms), 0) / 1000)
+        roll = rng.random()
+        if roll < rate_limit_rate:
+            stats["rate_limited"] += 1
+            return JSONResponse(
+                {"status_code": 25, "status_message": "Your request count is over the allowed limit."},
+                status_code=429, headers={"Retry-After": str(retry_after)}
+            )
+        if roll < rate_limit_rate + error_rate:
+            stats["errors"] += 1
+            return JSONResponse({"status_message": "Injected error"}, status_code=500)
+
+        if fixtures_dir:
+            path = os.path.join(fixtures_dir, _record_key(request.url.path, dict(request.query_params)) + ".json")
+            if os.path.exists(path):
+                stats["replayed"] += 1
+                with open(path) as f:
+                    recorded = json.load(f)
+                return JSONResponse(recorded["body"], status_code=recorded["status"])
+            if upstream is not None:
+                params = {**request.query_params, "api_key": record_api_key}
+                response = await upstream.get(request.url.path.removeprefix("/3"), params=params)
+                try:
+                    body = response.json()
+                except ValueError:
+                    body = {"status_message": response.text}
+                # Only successes become fixtures; a 429 or 5xx would be replayed forever
+                if response.is_success:
+                    os.makedirs(fixtures_dir, exist_ok=True)
+                    with open(path, "w") as f:
+                        json.dump({"url": str(request.url.path), "status": response.status_code,
+                                   "body": body}, f)
+                    stats["recorded"] += 1
+                return JSONResponse(body, status_code=response.status_code)
+
+        return await call_next(request)
+
+    def not_found():
+        return JSONResponse(
+            {"status_code": 34, "status_message": "The resource you requested could not be found."},
+            status_code=404
+        )
+
+    @app.get("/3/genre/movie/list")
+    async def genre_list():
+        return {"genres": [{"id": gid, "name": name} for gid, name in sorted(set(GENRE_MAP.values()))]}
+
+    @app.get("/3/movie/popular")
+    async def popular(page: int = 1):
+        return _page([_list_item(m) for m in by_popularity], page)
+
+    @app.get("/3/trending/movie/week")
+    async def trending(page: int = 1):
+        return _page([_list_item(m) for m in by_trend], page)
+
+    @app.get("/3/search/movie")
+    async def search(query: str, page: int = 1):
+        q = query.lower()
+        hits = [m for m in by_popularity if q in m["title"].lower()]
+        return _page([_list_item(m) for m in hits], page)
+
+    @app.get("/3/movie/changes")
+    async def changes(start_date: str = "", end_date: str = "", page: int = 1):
+        # A stable ~1% of titles "change" per window, so incremental syncs have work to do
+        window = f"{start_date}:{end_date}"
+        hits = [m for m in by_popularity
+                if hashlib.md5(f"{window}:{m['id']}".encode()).digest()[0] < 3]
+        return _page([{"id": m["id"], "adult": False} for m in hits], page)
+
+    @app.get("/3/movie/{movie_id}")
+    async def details(movie_id: int, append_to_response: str = ""):
+        movie = movies.get(movie_id)
+        if movie is None:
+            return not_found()
+        body = {k: v for k, v in movie.items() if k != "credits"}
+        if "credits" in append_to_response.split(","):
+            body["credits"] = movie["credits"]
+        return body
+
+    @app.get("/3/movie/{movie_id}/credits")
+    async def credits(movie_id: int):
+        movie = movies.get(movie_id)
+        return movie["credits"] if movie else not_found()
+
+    @app.get("/3/movie/{movie_id}/similar")
+    async def similar(movie_id: int, page: int = 1):
+        movie = movies.get(movie_id)
+        if movie is None:
+            return not_found()
+        genre_ids = {g["id"] for g in movie["genres"]}
+        hits = [m for m in by_popularity
+                if m["id"] != movie_id and genre_ids & {g["id"] for g in m["genres"]}]
+        return _page([_list_item(m) for m in hits], page)
+
+    @app.get("/_standin/stats")
+    async def standin_stats():
+        return stats
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local TMDB stand-in server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--retry-after", type=int, default=1)
+    parser.add_argument("--fixtures-dir", default=None,
+                        help="Replay recorded responses from this directory")
+    parser.add_argument("--record", action="store_true",
+                        help="Proxy unrecorded requests to real TMDB (needs TMDB_API_KEY) and save them")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    record_key = None
+    if args.record:
+        record_key = os.getenv("TMDB_API_KEY")
+        if not record_key or not args.fixtures_dir:
+            parser.error("--record needs TMDB_API_KEY and --fixtures-dir")
+
+    movies = load_fixture_movies()
+    app = create_app(
+        movies=movies, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate, retry_after=args.retry_after,
+        fixtures_dir=args.fixtures_dir, record_api_key=record_key, seed=args.seed
+    )
+    print(f"TMDB stand-in serving {len(movies)} movies on http://{args.host}:{args.port}/3")
+
+    import uvicorn
+    uvicorn.run(app, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -11,6 +11,39 @@ import numpy as np
 sys.path.append(os.getcwd())
 from backend.app.core.config import settings
 
+NEIGHBOR_K = 50
+
+def build_neighbor_index(similarity_matrix, movie_ids, tmdb_by_movie, k=NEIGHBOR_K, chunk_size=1024):
+    """
+    Keep the k most similar items per item, best first
+    
+    Neighbors are stored as TMDB IDs (-1 where a movie has none) so the
+    explainer can match them against liked movies without the full matrix.
+    """
+    n = len(movie_ids)
+    k = max(min(k, n - 1), 1)
+    tmdb_ids = np.array([tmdb_by_movie.get(mid, -1) for mid in movie_ids], dtype=np.float64)
+    tmdb_ids = np.nan_to_num(tmdb_ids, nan=-1).astype(np.int64)
+    
+    neighbor_idx = np.empty((n, k), dtype=np.int64)
+    neighbor_scores = np.empty((n, k), dtype=np.float32)
+    # Chunked so only a slice of the matrix is copied at a time
+    for start in range(0, n, chunk_size):
+        rows = np.array(similarity_matrix[start:start + chunk_size], dtype=np.float32)
+        rows[np.arange(len(rows)), np.arange(start, start + len(rows))] = -np.inf  # Not its own neighbor
+        top = np.argpartition(-rows, k - 1, axis=1)[:, :k]
+        scores = np.take_along_axis(rows, top, axis=1)
+        order = np.argsort(-scores, axis=1, kind='stable')
+        neighbor_idx[start:start + len(rows)] = np.take_along_axis(top, order, axis=1)
+        neighbor_scores[start:start + len(rows)] = np.take_along_axis(scores, order, axis=1)
+    
+    return {
+        'movie_ids': np.array(movie_ids),
+        'tmdb_ids': tmdb_ids,
+        'neighbor_ids': tmdb_ids[neighbor_idx],
+        'neighbor_scores': np.maximum(neighbor_scores, 0),
+    }
+
 def train_model():
     print("Starting Model Training...")
     
@@ -43,6 +76,10 @@ def train_model():
         
         print(f"Similarity Matrix Shape: {similarity_matrix.shape}")
         
+        # 4b. Top-K neighbors per item, keyed by TMDB ID, for "because you liked X" explanations
+        tmdb_by_movie = pd.read_sql("SELECT id, tmdb_id FROM movies", engine).set_index('id')['tmdb_id']
+        neighbors = build_neighbor_index(similarity_matrix, list(user_item_matrix.index), tmdb_by_movie)
+        
         # 5. Save Artifacts
         artifacts = {
             'user_item_matrix': user_item_matrix,
@@ -55,6 +92,9 @@ def train_model():
             
         print("Model trained and saved to backend/model_data.pkl")
         
+        np.savez_compressed("backend/model_neighbors.npz", **neighbors)
+        print(f"Neighbor index ({neighbors['neighbor_ids'].shape[1]} per movie) saved to backend/model_neighbors.npz")
+        
         # 6. Calc Metrics (RMSE on Test Set)
         # Simplified prediction for metric: Predict Mean of item
         # Real eval would be complex loops over test_df using the sim matrix
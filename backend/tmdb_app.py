@@ -0,0 +1,491 @@
+import asyncio
+import json
+import os
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from dotenv import load_dotenv
+
+from backend.backend.catalog_refresher import CatalogRefresher, details_summary
+from backend.backend.explainable_recommender import ExplainableRecommender
+from backend.backend.explanation_cache import ExplanationCache
+from backend.backend.neighbor_index import NeighborIndex
+from backend.backend.response_cache import ResponseCache
+from backend.backend.talent_index import TalentIndex
+from backend.backend.tmdb_client import TMDBClient, TMDBError
+from backend.backend.user_history import (
+    AsyncUserHistoryManager, PersonalizedRecommender, UserHistoryManager
+)
+
+# Load environment variables
+load_dotenv()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if not USE_MOCK_DATA:
+        catalog_refresher.start()
+    yield
+    await catalog_refresher.stop()
+    await tmdb_client.close()
+    if _personalization is not None:
+        _personalization["async_history"].close()
+
+
+app = FastAPI(title="Movie Recommender API", lifespan=lifespan)
+
+# CORS Configuration
+origins = [
+    "http://localhost:3000",
+    "http://127.0.0.1:3000",
+    "https://mruhan17.github.io",
+    "https://movie-recommender-mruhan17.vercel.app",
+]
+
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=origins,
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
+
+# Get API Key
+TMDB_API_KEY = os.getenv("TMDB_API_KEY")
+USE_MOCK_DATA = not TMDB_API_KEY
+if not TMDB_API_KEY:
+    print("WARNING: TMDB_API_KEY not found in environment variables")
+    print("INFO: Using mock data for development")
+
+TMDB_BASE_URL = os.getenv("TMDB_BASE_URL", "https://api.themoviedb.org/3")
+
+# Shared keep-alive pool for all TMDB traffic from the route handlers
+tmdb_client = TMDBClient(
+    api_key=TMDB_API_KEY,
+    base_url=TMDB_BASE_URL,
+    timeout=float(os.getenv("TMDB_TIMEOUT", "10")),
+    max_concurrency=int(os.getenv("TMDB_MAX_CONCURRENCY", "10"))
+)
+
+# Warm snapshot of trending/popular so routes don't pay for TMDB round trips
+catalog_refresher = CatalogRefresher(
+    tmdb_client,
+    pages=int(os.getenv("CATALOG_PREFETCH_PAGES", "3")),
+    interval=float(os.getenv("CATALOG_REFRESH_INTERVAL", "600")),
+    max_staleness=float(os.getenv("CATALOG_MAX_STALENESS", "1800"))
+)
+
+# Serialized responses for the public endpoints, shared by all anonymous users
+response_cache = ResponseCache(max_entries=int(os.getenv("RESPONSE_CACHE_SIZE", "1024")))
+RESPONSE_MAX_AGE = int(os.getenv("RESPONSE_CACHE_MAX_AGE", "60"))
+RESPONSE_STALE_WHILE_REVALIDATE = int(os.getenv("RESPONSE_CACHE_SWR", "300"))
+
+# Personalization: history store, its async facade, ranker and explainer.
+# Built on first use so importing this module never creates or migrates a database.
+_personalization: Optional[Dict] = None
+
+
+def get_personalization() -> Dict:
+    """Shared history manager, async facade, personalized ranker and explainer"""
+    global _personalization
+    if _personalization is None:
+        history_manager = UserHistoryManager(os.getenv("USER_HISTORY_DB", "user_history.db"))
+        async_history = AsyncUserHistoryManager(history_manager)
+        explanation_cache = ExplanationCache(
+            max_bytes=int(os.getenv("EXPLANATION_CACHE_BYTES", str(32 * 1024 * 1024)))
+        )
+        explanation_cache.attach(history_manager)
+        # Offline indexes behind talent and "because you liked" reasons, when built
+        talent_index = TalentIndex.open_if_exists(os.getenv("TALENT_INDEX_PATH", "talent_index.db"))
+        if talent_index is not None:
+            talent_index.attach(history_manager)
+        neighbor_index = NeighborIndex.load_if_exists(
+            os.getenv("NEIGHBOR_INDEX_PATH", "backend/model_neighbors.npz")
+        )
+        _personalization = {
+            "history_manager": history_manager,
+            "async_history": async_history,
+            "recommender": PersonalizedRecommender(history_manager, async_history),
+            "explanation_cache": explanation_cache,
+            "explainer": ExplainableRecommender(
+                history_manager, None, talent_index=talent_index,
+                explanation_cache=explanation_cache, neighbor_index=neighbor_index
+            ),
+        }
+    return _personalization
+
+
+# TMDB genre ID -> name; list results only carry genre_ids
+_genre_names: Dict[int, str] = {}
+
+# Mock movie data for development when TMDB API key is not available
+MOCK_MOVIES = {
+    "results": [
+        {
+            "id": 1,
+            "title": "The Shawshank Redemption",
+            "poster_path": "/q6y0Go1tsGEsmtFryDOJo3dEmqu.jpg",
+            "vote_average": 8.7,
+            "overview": "Framed in the 1940s for the double murder of his wife and her lover, upstanding banker Andy Dufresne begins a new life at the Shawshank prison, where he puts his accounting skills to work for an amoral warden.",
+            "release_date": "1994-09-23",
+            "genres": ["Drama", "Crime"]
+        },
+        {
+            "id": 2,
+            "title": "The Godfather",
+            "poster_path": "/3bhkrj58Vtu7enYsRolD1fZdja1.jpg",
+            "vote_average": 8.7,
+            "overview": "Spanning the years 1945 to 1955, a chronicle of the fictional Italian-American Corleone crime family.",
+            "release_date": "1972-03-14",
+            "genres": ["Drama", "Crime"]
+        },
+        {
+            "id": 3,
+            "title": "The Dark Knight",
+            "poster_path": "/qJ2tW6WMUDux911r6m7haRef0WH.jpg",
+            "vote_average": 8.5,
+            "overview": "Batman raises the stakes in his war on crime with the help of Lt. Jim Gordon and District Attorney Harvey Dent.",
+            "release_date": "2008-07-16",
+            "genres": ["Action", "Crime", "Drama"]
+        },
+        {
+            "id": 4,
+            "title": "Pulp Fiction",
+            "poster_path": "/d5iIlFn5s0ImszYzBPb8JPIfbXD.jpg",
+            "vote_average": 8.5,
+            "overview": "A burger-loving hit man, his philosophical partner, a drug-addled gangster's moll and a washed-up boxer converge in this sprawling crime comedy.",
+            "release_date": "1994-09-10",
+            "genres": ["Crime", "Drama"]
+        },
+        {
+            "id": 5,
+            "title": "Forrest Gump",
+            "poster_path": "/arw2vcBveWOVZr6pxd9XTd1TdQa.jpg",
+            "vote_average": 8.5,
+            "overview": "A man with a low IQ has accomplished great things in his life and been present during significant historic events.",
+            "release_date": "1994-06-23",
+            "genres": ["Comedy", "Drama", "Romance"]
+        },
+        {
+            "id": 6,
+            "title": "Inception",
+            "poster_path": "/9gk7adHYeDvHkCSEqAvQNLV5Uge.jpg",
+            "vote_average": 8.4,
+            "overview": "Cobb, a skilled thief who commits corporate espionage by infiltrating the subconscious of his targets is offered a chance to regain his old life.",
+            "release_date": "2010-07-15",
+            "genres": ["Action", "Science Fiction", "Adventure"]
+        },
+        {
+            "id": 7,
+            "title": "Fight Club",
+            "poster_path": "/pB8BM7pdSp6B6Ih7QZ4DrQ3PmJK.jpg",
+            "vote_average": 8.4,
+            "overview": "A ticking-time-bomb insomniac and a slippery soap salesman channel primal male aggression into a shocking new form of therapy.",
+            "release_date": "1999-10-15",
+            "genres": ["Drama"]
+        },
+        {
+            "id": 8,
+            "title": "The Matrix",
+            "poster_path": "/f89U3ADr1oiB1s9GkdPOEpXUk5H.jpg",
+            "vote_average": 8.2,
+            "overview": "Set in the 22nd century, The Matrix tells the story of a computer hacker who joins a group of underground insurgents fighting the vast and powerful computers who now rule the earth.",
+            "release_date": "1999-03-30",
+            "genres": ["Action", "Science Fiction"]
+        },
+        {
+            "id": 9,
+            "title": "Goodfellas",
+            "poster_path": "/aKuFiU82s5ISJpGZp7YkIr3kCUd.jpg",
+            "vote_average": 8.5,
+            "overview": "The story of Henry Hill and his life in the mob, covering his relationship with his wife Karen Hill and his mob partners.",
+            "release_date": "1990-09-12",
+            "genres": ["Drama", "Crime"]
+        },
+        {
+            "id": 10,
+            "title": "Interstellar",
+            "poster_path": "/gEU2QniE6E77NI6lCU6MxlNBvIx.jpg",
+            "vote_average": 8.4,
+            "overview": "The adventures of a group of explorers who make use of a newly discovered wormhole to surpass the limitations on human space travel.",
+            "release_date": "2014-11-05",
+            "genres": ["Adventure", "Drama", "Science Fiction"]
+        }
+    ],
+    "page": 1,
+    "total_pages": 1,
+    "total_results": 10
+}
+
+
+# Pydantic Models
+class MovieAction(BaseModel):
+    movie_id: int
+    title: str
+    genres: List[str]
+    rating: float
+
+
+class UserProfile(BaseModel):
+    user_id: str
+    watched: List[MovieAction] = []
+    liked: List[MovieAction] = []
+
+
+# Helper functions
+async def get_tmdb_data(endpoint: str, params: dict = None):
+    """Fetch data from TMDB API or return mock data"""
+    if USE_MOCK_DATA:
+        # Return mock data for development
+        print(f"INFO: Returning mock data for endpoint: {endpoint}")
+        return MOCK_MOVIES.copy()
+    
+    if not TMDB_API_KEY:
+        raise HTTPException(status_code=500, detail="TMDB API key not configured")
+
+    try:
+        return await tmdb_client.get(endpoint, params)
+    except TMDBError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+
+
+@app.get("/")
+async def root():
+    return {"message": "Movie Recommender API", "status": "running"}
+
+
+@app.get("/health_check")
+async def health_check():
+    return {"status": "healthy"}
+
+
+@app.get("/api/debug")
+async def debug_status():
+    """Check if API key is configured"""
+    return {
+        "use_mock_data": USE_MOCK_DATA,
+        "api_key_found": bool(TMDB_API_KEY),
+        "api_key_length": len(TMDB_API_KEY) if TMDB_API_KEY else 0,
+        "env_vars": list(os.environ.keys()),
+        "tmdb_scheduler": tmdb_client.scheduler.stats(),
+        "catalog_snapshot_age": catalog_refresher.status()
+    }
+
+
+async def cached_public_response(request: Request, route: str, params: dict, compute):
+    """Serve an anonymous endpoint through the response cache"""
+    try:
+        return await response_cache.respond(
+            request, route, params, compute,
+            max_age=RESPONSE_MAX_AGE,
+            stale_while_revalidate=RESPONSE_STALE_WHILE_REVALIDATE
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/movies/trending")
+async def get_trending(request: Request, page: int = 1):
+    """Get trending movies from TMDB"""
+    async def compute():
+        data = catalog_refresher.get_page("trending", page)
+        if data is None:
+            data = await get_tmdb_data("/trending/movie/week", {"page": page})
+        return data
+
+    return await cached_public_response(request, "trending", {"page": page}, compute)
+
+
+@app.get("/api/movies/search")
+async def search_movies(request: Request, query: str, page: int = 1):
+    """Search for movies"""
+    # TMDB search ignores case and extra whitespace, so the cache key does too
+    normalized_query = " ".join(query.lower().split())
+
+    async def compute():
+        return await get_tmdb_data("/search/movie", {"query": normalized_query, "page": page})
+
+    return await cached_public_response(
+        request, "search", {"query": normalized_query, "page": page}, compute
+    )
+
+
+@app.get("/api/recommendations/default")
+async def get_default_recommendations(request: Request, top_n: int = 10):
+    """Get default recommendations for anonymous users"""
+    async def compute():
+        # Return popular movies as default recommendations
+        data = catalog_refresher.get_page("popular", 1)
+        if data is None:
+            data = await get_tmdb_data("/movie/popular", {"page": 1})
+        results = data.get("results", [])[:top_n]
+        return {"recommendations": results, "method": "popular"}
+
+    return await cached_public_response(request, "default_recommendations", {"top_n": top_n}, compute)
+
+
+@app.get("/api/recommendations/{user_id}")
+async def get_recommendations(user_id: str, top_n: int = 10):
+    """Get personalized recommendations (simplified - returns popular movies)"""
+    try:
+        # For now, return popular movies as recommendations
+        data = catalog_refresher.get_page("popular", 1)
+        if data is None:
+            data = await get_tmdb_data("/movie/popular", {"page": 1})
+        results = data.get("results", [])[:top_n]
+        return {"recommendations": results, "method": "popular"}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+async def get_genre_names() -> Dict[int, str]:
+    """TMDB genre ID -> name, fetched once"""
+    global _genre_names
+    if not _genre_names and not USE_MOCK_DATA:
+        try:
+            data = await tmdb_client.get("/genre/movie/list")
+            _genre_names = {g["id"]: g["name"] for g in data.get("genres", [])}
+        except TMDBError as e:
+            print(f"WARNING: Could not load TMDB genre list: {e}")
+    return _genre_names
+
+
+async def get_candidate_movies() -> List[Dict]:
+    """Popular and trending movies to rank, from the warm snapshot when possible"""
+    candidates, seen = [], set()
+    for feed, endpoint in (("popular", "/movie/popular"), ("trending", "/trending/movie/week")):
+        data = catalog_refresher.get_page(feed, 1)
+        if data is None:
+            data = await get_tmdb_data(endpoint, {"page": 1})
+        for movie in data.get("results", []):
+            if movie["id"] not in seen:
+                seen.add(movie["id"])
+                candidates.append(movie)
+
+    # Raw list results (cold or stale snapshot, failed enrichment) have only
+    # genre_ids; ranking and explanations match on genre names
+    if any("genres" not in movie for movie in candidates):
+        names = await get_genre_names()
+        candidates = [
+            movie if "genres" in movie else {
+                **movie, "genres": [names[g] for g in movie.get("genre_ids", []) if g in names]
+            }
+            for movie in candidates
+        ]
+    return candidates
+
+
+async def movie_for_explanation(movie: Dict) -> Dict:
+    """Shape a list result for the explainer, fetching details only if the snapshot lacks them"""
+    extra = {}
+    # Enriched snapshot entries carry cast; anything else needs its details
+    if "cast" not in movie and not USE_MOCK_DATA:
+        try:
+            details = await tmdb_client.get(f"/movie/{movie['id']}", {"append_to_response": "credits"})
+            extra = details_summary(details)
+        except TMDBError:
+            pass  # Explain from what the list result has
+    movie = {**movie, **extra}
+    movie["tmdb_data"] = {
+        "vote_average": movie.get("vote_average", 0),
+        "vote_count": movie.get("vote_count", 0),
+        "popularity": movie.get("popularity", 0),
+        "director": movie.get("director"),
+        "cast": movie.get("cast", []),
+    }
+    return movie
+
+
+def ndjson_line(payload: Dict) -> bytes:
+    return (json.dumps(payload, default=str) + "\n").encode()
+
+
+@app.get("/api/recommendations/{user_id}/stream")
+async def stream_recommendations(user_id: str, top_n: int = 10):
+    """
+    Stream personalized recommendations, then their explanations, as NDJSON
+
+    The first line carries the ranked list as soon as scoring finishes; each
+    following line is one card's explanation, in completion order; a final
+    "done" line closes the stream.
+    """
+    personalization = get_personalization()
+    async_history, explainer = personalization["async_history"], personalization["explainer"]
+    candidates = await get_candidate_movies()
+    recommendations = await personalization["recommender"].get_recommendations_async(
+        user_id, candidates, top_n=top_n
+    )
+
+    async def events():
+        yield ndjson_line({
+            "type": "recommendations",
+            "method": "personalized",
+            "recommendations": recommendations,
+        })
+
+        async def prepare(recommended: Dict):
+            # Failures stay with their card instead of ending the stream
+            try:
+                return recommended, await movie_for_explanation(recommended), None
+            except Exception as e:
+                return recommended, None, e
+
+        session = None
+        pending = [asyncio.ensure_future(prepare(m)) for m in recommendations]
+        try:
+            for next_movie in asyncio.as_completed(pending):
+                recommended, movie, error = await next_movie
+                try:
+                    if error is not None:
+                        raise error
+                    if session is None:
+                        # Created on first use so the profile lookup overlaps the detail fetches
+                        session = await async_history.run(explainer.session, user_id)
+                    explanation = await async_history.run(session.explain, movie)
+                    yield ndjson_line({"type": "explanation", "movie_id": movie["id"], "explanation": explanation})
+                except Exception as e:
+                    yield ndjson_line({"type": "error", "movie_id": recommended["id"], "detail": str(e)})
+        finally:
+            # Client went away: stop fetching details nobody will read
+            for task in pending:
+                task.cancel()
+
+        yield ndjson_line({"type": "done"})
+
+    return StreamingResponse(
+        events(),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-store", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.get("/api/explain/{user_id}/{movie_id}")
+async def explain_recommendation(user_id: str, movie_id: int):
+    """Explain why a movie is recommended (simplified)"""
+    try:
+        # Get movie details
+        movie_data = await get_tmdb_data(f"/movie/{movie_id}")
+
+        return {
+            "movie_id": movie_id,
+            "title": movie_data.get("title"),
+            "explanation": "This movie is popular and highly rated.",
+            "genres": [g["name"] for g in movie_data.get("genres", [])],
+            "rating": movie_data.get("vote_average"),
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/api/history/add")
+async def add_to_history(action: MovieAction):
+    """Add movie to user history (simplified - just returns success)"""
+    return {"status": "success", "message": "History tracking coming soon"}
+
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run(app, host="0.0.0.0", port=8000)